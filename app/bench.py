@@ -0,0 +1,414 @@
+"""
+Offline client-overhead benchmarks.
+
+The default set runs against app.mock_ollama and synthetic data, so the numbers
+measure this repo's code (NDJSON iteration, JSON coercion, FAISS build/query)
+rather than a model. "embedders" is opt-in: it loads the real embedding models
+to compare backends. Each benchmark returns a list of result dicts:
+  {"name": ..., "value": float, "unit": ..., "better": "higher"|"lower"}
+"""
+import os
+import sys
+import glob
+import json
+import time
+import tempfile
+import multiprocessing as mp
+import hashlib
+import importlib
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .mock_ollama import start_mock_server
+from .embedders import BACKENDS, Embedder, get_embedder
+
+def _result(name: str, value: float, unit: str, better: str) -> Dict[str, Any]:
+    return {"name": name, "value": float(value), "unit": unit, "better": better}
+
+def _median_time(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+def _optional(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        print(f"  (skipping {module} benchmarks: {e})")
+        return None
+
+# ---------- streaming ----------
+
+def bench_streaming(reply_tokens: int = 2000, token_chars: int = 4, repeat: int = 5) -> List[Dict[str, Any]]:
+    """Client-side tokens/s for llm.chat (stream + non-stream) and pipeline._complete_json against an unthrottled server."""
+    out = []
+    srv = start_mock_server(latency_ms=0, tokens_per_s=0, reply_tokens=reply_tokens, token_chars=token_chars)
+    # the clients read their server URL from module globals; point them at the mock and restore afterwards
+    restore = []
+    try:
+        llm = _optional("llm")
+        if llm is not None:
+            restore.append((llm, "CHAT_URL", llm.CHAT_URL))
+            llm.CHAT_URL = f"{srv.url}/api/chat"
+            msgs = [{"role": "user", "content": "stream please"}]
+
+            def stream_once():
+                n = sum(1 for _ in llm.chat(msgs, model="mock", stream=True))
+                assert n >= reply_tokens
+
+            t = _median_time(stream_once, repeat)
+            out.append(_result(f"llm.chat stream ({reply_tokens} tok)", reply_tokens / t, "tok/s", "higher"))
+            t = _median_time(lambda: llm.chat(msgs, model="mock", stream=False), repeat)
+            out.append(_result(f"llm.chat non-stream ({reply_tokens} tok)", reply_tokens / t, "tok/s", "higher"))
+
+        pipeline = _optional("pipeline")
+        if pipeline is not None:
+            restore.append((pipeline, "HOST", pipeline.HOST))
+            pipeline.HOST = srv.url
+            prompt = pipeline.PROMPT_TMPL.format(goal="bench", deliverable="bench")
+            t = _median_time(lambda: pipeline._complete_json(pipeline.GEN_SYS, prompt, "mock"), repeat)
+            out.append(_result(f"pipeline._complete_json stream ({reply_tokens} tok)", reply_tokens / t, "tok/s", "higher"))
+    finally:
+        for module, attr, value in restore:
+            setattr(module, attr, value)
+        srv.shutdown()
+        srv.server_close()
+    return out
+
+# ---------- JSON coercion ----------
+
+def _coercion_inputs(n_items: int) -> Dict[str, str]:
+    obj = {
+        "analysis": [f"point {i}: local models keep data on the machine" for i in range(n_items)],
+        "plan": [{"step": i, "do": f"action {i}"} for i in range(n_items)],
+        "output": "# README\n" + "\n".join(f"- line {i}" for i in range(n_items)),
+    }
+    clean = json.dumps(obj)
+    trailing = clean.replace("]", ",]").replace("}", ",}")
+    return {
+        "clean": clean,
+        "fenced": "Here you go:\n```json\n" + json.dumps(obj, indent=2) + "\n```\nDone.",
+        "prose+trailing_commas": "Sure! " + trailing + " Hope that helps.",
+        "sections": (
+            "=== ANALYSIS ===\n" + json.dumps(obj["analysis"]) +
+            "\n=== PLAN ===\n" + "\n".join(f"step {i}" for i in range(n_items)) +
+            "\n=== OUTPUT ===\n" + obj["output"]
+        ),
+    }
+
+def bench_json_coercion(n_items: int = 200, repeat: int = 50) -> List[Dict[str, Any]]:
+    pipeline = _optional("pipeline")
+    if pipeline is None:
+        return []
+    out = []
+    for label, text in _coercion_inputs(n_items).items():
+        pipeline._coerce_json(text)  # fail fast if a fixture stops parsing
+        t = _median_time(lambda: pipeline._coerce_json(text), repeat)
+        out.append(_result(f"_coerce_json {label} ({len(text) // 1024} KiB)", t * 1e6, "us", "lower"))
+    return out
+
+# ---------- retrieval ----------
+
+class HashEmbedder(Embedder):
+    """
+    Deterministic stand-in for SentenceTransformer: hashed bag-of-words into `dim` buckets.
+    Same encode() surface as the real model, so it plugs into RAGIndex(model=...) and rag_query.retrieve(embedder=...).
+    """
+    backend = "hash"
+    model_name = "hash"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _bucket(self, word: str) -> int:
+        return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little") % self.dim
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        vecs = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vecs[row, self._bucket(word)] += 1.0
+        if normalize_embeddings:
+            vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        return vecs
+
+def synthetic_corpus(n_docs: int, words_per_doc: int = 80, vocab: int = 5000, seed: int = 0) -> List[tuple]:
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    # zipf-ish draw so some terms are common and most are rare, like real text
+    ranks = np.minimum(rng.zipf(1.3, size=(n_docs, words_per_doc)), vocab) - 1
+    return [(f"doc_{i:06d}.txt", " ".join(words[j] for j in row)) for i, row in enumerate(ranks)]
+
+def bench_retrieval(n_docs: int = 5000, n_queries: int = 200, k: int = 4, workdir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """RAGIndex build/query and rag_query.retrieve latency on a synthetic corpus with HashEmbedder."""
+    rag = _optional("app.rag")
+    if rag is None:
+        return []
+    out = []
+    docs = synthetic_corpus(n_docs)
+    queries = [txt[:60] for _, txt in docs[:n_queries]]
+    embedder = HashEmbedder()
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        idx = rag.RAGIndex(index_path=os.path.join(tmp, "index.faiss"), meta_path=os.path.join(tmp, "meta.json"), model=embedder)
+        t = _median_time(lambda: idx.build(docs), 3)
+        out.append(_result(f"RAGIndex.build ({n_docs} docs)", t, "s", "lower"))
+        t = _median_time(idx.load, 10)
+        out.append(_result(f"RAGIndex.load ({n_docs} docs)", t, "s", "lower"))
+
+        lat = []
+        for q in queries:
+            t0 = time.perf_counter()
+            idx.query(q, k=k)
+            lat.append(time.perf_counter() - t0)
+        out.append(_result(f"RAGIndex.query p50 ({n_docs} docs)", np.percentile(lat, 50) * 1e3, "ms", "lower"))
+        out.append(_result(f"RAGIndex.query p95 ({n_docs} docs)", np.percentile(lat, 95) * 1e3, "ms", "lower"))
+
+        rag_query = _optional("rag_query")
+        if rag_query is not None:
+            ids = [d for d, _ in docs]
+            lat = []
+            for q in queries:
+                t0 = time.perf_counter()
+                rag_query.retrieve(q, k, "hash", idx.index, ids, embedder=embedder)
+                lat.append(time.perf_counter() - t0)
+            out.append(_result(f"rag_query.retrieve p50 ({n_docs} docs)", np.percentile(lat, 50) * 1e3, "ms", "lower"))
+    return out
+
+# ---------- hybrid (BM25 shortlist + dense rerank) ----------
+
+def bench_hybrid(n_docs: int = 20000, n_queries: int = 200, k: int = 5, workdir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    RAGIndex.query latency and recall@k for dense, hybrid and lexical modes. Two query sets, one target doc each:
+    "ident" asks about an error code planted in the doc (the keyword-friendly case), "excerpt" quotes the doc's opening words.
+    """
+    rag = _optional("app.rag")
+    if rag is None:
+        return []
+    rng = np.random.default_rng(1)
+    docs = synthetic_corpus(n_docs)
+    targets = rng.choice(n_docs, size=n_queries, replace=False).tolist()
+    queries = {"ident": [], "excerpt": []}
+    for t in targets:
+        code = f"E{rng.integers(16 ** 6):06x}_{rng.choice(['TIMEOUT', 'REFUSED', 'NOT_FOUND'])}"
+        doc_id, text = docs[t]
+        words = text.split()
+        words.insert(int(rng.integers(len(words))), code)
+        docs[t] = (doc_id, " ".join(words))
+        queries["ident"].append((f"what does {code} mean", t))
+        queries["excerpt"].append((text[:60], t))
+    out = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        idx = rag.RAGIndex(index_path=os.path.join(tmp, "index.faiss"), meta_path=os.path.join(tmp, "meta.json"), model=HashEmbedder())
+        idx.build(docs)
+        idx.load()
+        for mode in rag.QUERY_MODES:
+            for kind, qs in queries.items():
+                found, lat = 0, []
+                for q, t in qs:
+                    t0 = time.perf_counter()
+                    hits = idx.query(q, k=k, mode=mode)
+                    lat.append(time.perf_counter() - t0)
+                    found += any(h["id"] == docs[t][0] for h in hits)
+                out.append(_result(f"{mode} recall@{k} {kind} ({n_docs} docs)", found / len(qs), "ratio", "higher"))
+                out.append(_result(f"{mode} query p50 {kind} ({n_docs} docs)", np.percentile(lat, 50) * 1e3, "ms", "lower"))
+    return out
+
+# ---------- near-duplicate elimination ----------
+
+def near_duplicate_corpus(n_docs: int, dup_rate: float = 0.3, seed: int = 0) -> List[tuple]:
+    """synthetic_corpus plus edited copies (one word changed) of a `dup_rate` fraction of the docs."""
+    rng = np.random.default_rng(seed)
+    docs = synthetic_corpus(n_docs, seed=seed)
+    dups = []
+    for i in rng.choice(n_docs, int(n_docs * dup_rate), replace=False):
+        doc_id, text = docs[i]
+        words = text.split()
+        words[rng.integers(len(words))] = "edited"
+        dups.append((doc_id.replace(".txt", "_copy.txt"), " ".join(words)))
+    return docs + dups
+
+def bench_dedup(n_docs: int = 3000, threshold: float = 0.85, workdir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Dedup stage cost vs. RAGIndex.build time saved, on a corpus with 30% near-duplicates."""
+    rag = _optional("app.rag")
+    if rag is None:
+        return []
+    from .dedup import dedup_docs
+    docs = near_duplicate_corpus(n_docs)
+    out = []
+    t = _median_time(lambda: dedup_docs(docs, threshold=threshold), 3)
+    out.append(_result(f"dedup_docs ({len(docs)} docs)", t, "s", "lower"))
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        idx = rag.RAGIndex(index_path=os.path.join(tmp, "index.faiss"), meta_path=os.path.join(tmp, "meta.json"), model=HashEmbedder())
+        t_plain = _median_time(lambda: idx.build(docs), 3)
+        t_dedup = _median_time(lambda: idx.build(docs, dedup=threshold), 3)
+        out.append(_result(f"RAGIndex.build ({len(docs)} docs, no dedup)", t_plain, "s", "lower"))
+        out.append(_result(f"RAGIndex.build ({len(docs)} docs, dedup={threshold})", t_dedup, "s", "lower"))
+        out.append(_result(f"dedup docs dropped ({len(docs)} docs)", idx.dedup_report["docs_dropped"], "docs", "higher"))
+    return out
+
+# ---------- sharded scatter-gather ----------
+
+def bench_shards(n_docs: int = 200_000, dim: int = 384, n_queries: int = 200, k: int = 10,
+                 shard_counts: Optional[List[int]] = None, workdir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Query throughput of ShardedRAGIndex vs shard count on a fixed synthetic corpus (random unit vectors,
+    one worker per shard). Expect near-linear scaling up to the number of physical cores.
+    """
+    from .shards import ShardedRAGIndex, build_sharded
+    cores = os.cpu_count() or 1
+    shard_counts = shard_counts or sorted({1, 2, 4, 8} & set(range(1, max(cores, 1) + 1))) or [1]
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((n_docs, dim), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    docs = [(f"doc_{i:07d}", f"doc {i}") for i in range(n_docs)]
+    queries = vecs[rng.choice(n_docs, n_queries, replace=False)] + rng.standard_normal((n_queries, dim), dtype=np.float32) * 0.01
+
+    out = []
+    base_qps = None
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for n in shard_counts:
+            shard_dir = os.path.join(tmp, f"s{n}")
+            build_sharded(docs, shard_dir, n, backend="synthetic", vectors=vecs)
+            with ShardedRAGIndex(shard_dir, workers=n) as idx:
+                idx.search_vectors(queries[:2], k)  # warm-up
+                t0 = time.perf_counter()
+                for q in queries:
+                    idx.search_vectors(q[None, :], k)
+                qps = n_queries / (time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                idx.search_vectors(queries, k)
+                batch_qps = n_queries / (time.perf_counter() - t0)
+            base_qps = base_qps or qps
+            out.append(_result(f"shards={n} query throughput ({n_docs} docs)", qps, "q/s", "higher"))
+            out.append(_result(f"shards={n} batched throughput ({n_docs} docs)", batch_qps, "q/s", "higher"))
+            out.append(_result(f"shards={n} speedup vs 1 shard", qps / base_qps, "x", "higher"))
+    if max(shard_counts) > cores:
+        print(f"  (only {cores} CPU cores; shard counts above that cannot scale)")
+    return out
+
+# ---------- embedding backends ----------
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # peak rather than current RSS, but the best we have without psutil
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def _embed_child(backend: str, texts: List[str], queue):
+    # runs in a fresh process so RSS reflects only this backend
+    try:
+        rss0 = _rss_mb()
+        t0 = time.perf_counter()
+        emb = get_embedder(backend)
+        emb.encode(texts[:8], normalize_embeddings=True)  # warm-up: lazy init, thread pools
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        vecs = emb.encode(texts, normalize_embeddings=True)
+        encode_s = time.perf_counter() - t0
+        queue.put({"backend": backend, "load_s": load_s, "encode_s": encode_s, "rss_mb": _rss_mb() - rss0, "vecs": vecs})
+    except Exception as e:
+        queue.put({"backend": backend, "error": f"{type(e).__name__}: {e}"})
+
+def _embedding_texts(n: int) -> List[str]:
+    sentences = []
+    for path in sorted(glob.glob("data/sample_docs/*.txt")):
+        with open(path, "r", encoding="utf-8") as f:
+            sentences += [s.strip() for s in f.read().split(".") if s.strip()]
+    sentences = sentences or ["Local models keep data on your machine"]
+    # vary lengths and content so batching and truncation behave like a real corpus
+    return [f"{sentences[i % len(sentences)]} (note {i}: {' '.join(['detail'] * (i % 40))})" for i in range(n)]
+
+def _child_result(proc, queue, timeout_s: float) -> Dict[str, Any]:
+    """Wait for the child's result without hanging if it dies hard (e.g. OOM-killed while loading a model)."""
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            if proc.exitcode is not None:
+                try:  # it may have exited right after putting its result
+                    return queue.get(timeout=1.0)
+                except Empty:
+                    return {"error": f"worker exited with code {proc.exitcode} without a result"}
+    proc.terminate()
+    return {"error": f"no result within {timeout_s:.0f}s"}
+
+def bench_embedders(backends: Optional[List[str]] = None, n_texts: int = 512, timeout_s: float = 1800) -> List[Dict[str, Any]]:
+    """
+    Throughput, RSS and cosine agreement with the torch backend, one subprocess per backend.
+    timeout_s bounds each backend, first-time model download/export included.
+    """
+    texts = _embedding_texts(n_texts)
+    ctx = mp.get_context("spawn")
+    runs = {}
+    for backend in backends or list(BACKENDS):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_embed_child, args=(backend, texts, queue))
+        proc.start()
+        res = _child_result(proc, queue, timeout_s)
+        proc.join()
+        if "error" in res:
+            print(f"  (skipping {backend}: {res['error']})")
+            continue
+        runs[backend] = res
+
+    out = []
+    ref = runs.get("torch")
+    for backend, r in runs.items():
+        out.append(_result(f"embed {backend} load", r["load_s"], "s", "lower"))
+        out.append(_result(f"embed {backend} throughput ({n_texts} texts)", n_texts / r["encode_s"], "texts/s", "higher"))
+        out.append(_result(f"embed {backend} RSS", r["rss_mb"], "MiB", "lower"))
+        if ref is not None and backend != "torch":
+            cos = (r["vecs"] * ref["vecs"]).sum(axis=1)  # both L2-normalized
+            out.append(_result(f"embed {backend} cosine vs torch (mean)", cos.mean(), "cos", "higher"))
+            out.append(_result(f"embed {backend} cosine vs torch (min)", cos.min(), "cos", "higher"))
+    return out
+
+BENCHMARKS: Dict[str, Callable[..., List[Dict[str, Any]]]] = {
+    "streaming": bench_streaming,
+    "json": bench_json_coercion,
+    "retrieval": bench_retrieval,
+    "dedup": bench_dedup,
+    "embedders": bench_embedders,
+    "shards": bench_shards,
+    "hybrid": bench_hybrid,
+}
+# run when no subset is named; "embedders" needs real models, "shards" and "hybrid" build large corpora
+DEFAULT_BENCHMARKS = ["streaming", "json", "retrieval", "dedup"]
+
+def run_all(names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    results = []
+    for name in names or DEFAULT_BENCHMARKS:
+        print(f"[{name}]")
+        results.extend(BENCHMARKS[name]())
+    return results
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float = 0.5) -> List[str]:
+    """Return one message per metric that got worse than baseline by more than `tolerance` (fraction)."""
+    base = {b["name"]: b for b in baseline}
+    regressions = []
+    for r in results:
+        b = base.get(r["name"])
+        if b is None or b["value"] <= 0:
+            continue
+        ratio = r["value"] / b["value"]
+        worse = ratio < 1 - tolerance if r["better"] == "higher" else ratio > 1 + tolerance
+        if worse:
+            regressions.append(f"{r['name']}: {r['value']:.3f} {r['unit']} vs baseline {b['value']:.3f} ({ratio:.2f}x)")
+    return regressions
@@ -0,0 +1,145 @@
+"""
+Near-duplicate document elimination (MinHash + LSH over word shingles).
+
+Runs before embedding: each doc becomes a set of hashed k-word shingles,
+MinHash signatures are bucketed by LSH bands to find candidate pairs, and
+candidates whose exact shingle Jaccard similarity reaches the threshold are
+merged into clusters. Each cluster keeps one canonical doc (the longest);
+members that also reach the threshold against it are recorded as its aliases
+and never embedded. Merging is transitive, so members that only chain to the
+canonical through other docs are split off into clusters of their own.
+"""
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.85
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+_PRIME = (1 << 32) + 15  # > every 32-bit shingle hash; a, b < 2**31 keep a*x + b inside uint64
+_MASK32 = np.uint64(0xFFFFFFFF)
+_ROLL = np.uint64(1000003)
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    """Unique 32-bit hashes of the k-word shingles of `text` (lower-cased, punctuation-insensitive)."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    # hash each word once, then combine k neighbours with a polynomial hash in numpy
+    wh = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    n = max(len(words) - k + 1, 1)
+    acc = np.zeros(n, dtype=np.uint64)
+    for j in range(min(k, len(words))):
+        acc = (acc * _ROLL + wh[j:j + n]) & _MASK32
+    return np.unique(acc)
+
+def _jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    inter = len(np.intersect1d(a, b, assume_unique=True))
+    return inter / (len(a) + len(b) - inter) if len(a) + len(b) else 1.0
+
+def _lsh_params(threshold: float, num_perm: int, max_miss: float = 0.001) -> Tuple[int, int]:
+    """
+    Pick bands x rows (= num_perm). More rows per band means fewer spurious candidates, so take the
+    most rows for which a pair exactly at the threshold is still missed with probability <= max_miss.
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 - threshold ** rows) ** bands <= max_miss:
+            return bands, rows
+    return num_perm, 1
+
+class DedupResult:
+    def __init__(self, docs: List[Tuple[str, str]], kept: List[int], aliases: Dict[str, List[str]], n_in: int, chars_in: int):
+        self.docs = docs          # canonical (doc_id, text) pairs, input order
+        self.kept = kept          # their positions in the input list
+        self.aliases = aliases    # canonical id -> ids of dropped near-duplicates
+        self.n_in = n_in
+        self.chars_in = chars_in
+
+    @property
+    def dropped(self) -> int:
+        return self.n_in - len(self.docs)
+
+    def report(self, embed_s: Optional[float] = None) -> Dict[str, float]:
+        """
+        Counts, plus estimated embedding time saved: embed_s (time to embed the kept docs) scaled by
+        dropped/kept doc count. Per-doc cost is roughly flat because the encoder truncates long docs.
+        """
+        kept_chars = sum(len(t) for _, t in self.docs)
+        out = {
+            "docs_in": self.n_in,
+            "docs_kept": len(self.docs),
+            "docs_dropped": self.dropped,
+            "clusters_with_aliases": len(self.aliases),
+            "chars_dropped": self.chars_in - kept_chars,
+        }
+        if embed_s is not None and self.docs:
+            out["embed_s"] = embed_s
+            out["embed_s_saved_est"] = embed_s * self.dropped / len(self.docs)
+        return out
+
+def dedup_docs(docs: List[Tuple[str, str]], threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM, seed: int = 1) -> DedupResult:
+    """Drop near-duplicates (shingle Jaccard >= threshold) from (doc_id, text) pairs. Deterministic for a given corpus."""
+    if not 0 < threshold <= 1:
+        # 85 (for 0.85) would silently drop nothing; <= 0 degrades LSH to single-row bands and compares nearly every pair
+        raise ValueError(f"dedup threshold must be in (0, 1], e.g. 0.85; got {threshold}")
+    n = len(docs)
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    sh = [shingles(t) for _, t in docs]
+
+    sigs = np.full((n, num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, s in enumerate(sh):
+        if len(s):
+            sigs[i] = ((a[:, None] * s[None, :] + b[:, None]) % _PRIME).min(axis=1)
+
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    bands, rows = _lsh_params(threshold, num_perm)
+    nonempty = np.array([i for i in range(n) if len(sh[i])], dtype=np.int64)
+    checked = set()
+    for band in range(bands):
+        # one opaque key per doc for this band; only buckets with 2+ docs need a Python loop
+        keys = np.ascontiguousarray(sigs[nonempty, band * rows:(band + 1) * rows]).view(np.dtype((np.void, rows * 8))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = counts[inverse] > 1
+        buckets: Dict[int, List[int]] = {}
+        for i, bucket in zip(nonempty[shared].tolist(), inverse[shared].tolist()):
+            buckets.setdefault(bucket, []).append(i)
+        for members in buckets.values():
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    if (i, j) in checked or find(i) == find(j):
+                        continue
+                    checked.add((i, j))
+                    if _jaccard(sh[i], sh[j]) >= threshold:
+                        parent[find(j)] = find(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    kept, aliases = [], {}
+    for members in clusters.values():
+        # A~B and B~C does not make A~C: only drop docs that are near-duplicates of the canonical itself;
+        # the rest go round again with their own canonical
+        while members:
+            # canonical = longest text (keeps the most content); earliest wins ties
+            canon = max(members, key=lambda i: (len(docs[i][1]), -i))
+            kept.append(canon)
+            dup = [i for i in members if i != canon and _jaccard(sh[canon], sh[i]) >= threshold]
+            if dup:
+                aliases[docs[canon][0]] = [docs[i][0] for i in dup]
+            members = [i for i in members if i != canon and i not in dup]
+    kept.sort()
+    return DedupResult([docs[i] for i in kept], kept, aliases, n, sum(len(t) for _, t in docs))
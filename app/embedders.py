@@ -0,0 +1,190 @@
+"""
+Pluggable sentence embedders for RAG.
+
+Every backend exposes SentenceTransformer's encode(texts, normalize_embeddings=...)
+surface, so RAGIndex and rag_query can swap them freely:
+
+  torch      SentenceTransformer on PyTorch (the original path)
+  onnx       the same weights exported to ONNX, run with onnxruntime
+  onnx-int8  dynamic int8 quantization of the ONNX model (smaller and faster on CPU)
+
+The ONNX backends need `onnxruntime`, `tokenizers` and `huggingface_hub`, not
+torch. Model files live under data/models/<model>/ and are fetched from the
+Hugging Face Hub on first use (or exported from the torch model if the Hub copy
+is unavailable and torch is installed).
+"""
+import os
+import shutil
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_BACKEND = os.environ.get("RAG_EMBEDDER", "torch")
+MODELS_DIR = os.environ.get("RAG_MODELS_DIR", "data/models")
+# all-MiniLM-L6-v2 was trained with 256-token inputs; sentence-transformers truncates there too
+MAX_SEQ_LENGTH = 256
+
+log = logging.getLogger(__name__)
+
+class Embedder(ABC):
+    """Base class: subclasses implement encode() and set `backend` / `model_name`."""
+    backend = "base"
+    model_name = EMBED_MODEL
+
+    @abstractmethod
+    def encode(self, texts: List[str], normalize_embeddings: bool = False, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Embed texts; returns a float32 array of shape (len(texts), dim)."""
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "model_name": self.model_name}
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    return vectors / norms
+
+class TorchEmbedder(Embedder):
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBED_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, normalize_embeddings=False, batch_size=32, show_progress_bar=False, **kwargs):
+        if len(texts) == 0:  # SentenceTransformer returns shape (0,) here
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+        emb = self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings,
+                                show_progress_bar=show_progress_bar, convert_to_numpy=True)
+        return np.asarray(emb, dtype="float32")
+
+class OnnxEmbedder(Embedder):
+    def __init__(self, model_name: str = EMBED_MODEL, quantized: bool = False, models_dir: str = MODELS_DIR, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        self.model_name = model_name
+        self.backend = "onnx-int8" if quantized else "onnx"
+        paths = prepare_onnx(model_name, models_dir=models_dir, quantized=quantized)
+
+        self.tokenizer = Tokenizer.from_file(paths["tokenizer"])
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()  # pad to the longest text in each batch
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(paths["model"], opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self._dim: Optional[int] = None
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            hidden = self.session.get_outputs()[0].shape[-1]
+            # exported graphs normally declare the hidden size; if it is symbolic, embed one probe text once
+            self._dim = hidden if isinstance(hidden, int) else self._embed_batch(["dimension probe"]).shape[1]
+        return self._dim
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        enc = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in enc], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]  # last_hidden_state: (batch, seq, dim)
+        # mean pooling over real tokens, matching the model's sentence-transformers pooling config
+        m = mask[..., None].astype(np.float32)
+        return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts, normalize_embeddings=False, batch_size=32, show_progress_bar=False, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.dim), dtype="float32")
+        # batch texts of similar length together so little compute is spent on padding
+        order = np.argsort([len(t) for t in texts])
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            chunks.append(self._embed_batch([texts[i] for i in order[start:start + batch_size]]))
+        emb = np.empty((len(texts), chunks[0].shape[1]), dtype="float32")
+        emb[order] = np.concatenate(chunks)
+        return _normalize(emb) if normalize_embeddings else emb
+
+# ---------- ONNX model files ----------
+
+def _model_dir(model_name: str, models_dir: str) -> str:
+    return os.path.join(models_dir, model_name.replace("/", "__"))
+
+def _download_onnx(model_name: str, out_dir: str):
+    from huggingface_hub import hf_hub_download
+    for remote, local in (("onnx/model.onnx", "model.onnx"), ("tokenizer.json", "tokenizer.json")):
+        shutil.copyfile(hf_hub_download(model_name, remote), os.path.join(out_dir, local))
+
+def _export_onnx(model_name: str, out_dir: str):
+    """Export the torch model's transformer to ONNX (used when the Hub has no ONNX copy or is unreachable)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    st = SentenceTransformer(model_name, device="cpu")
+    hf_model, tokenizer = st[0].auto_model.eval(), st[0].tokenizer
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(hf_model, tuple(sample[n] for n in names), os.path.join(out_dir, "model.onnx"),
+                          input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=14)
+    tokenizer.save_pretrained(out_dir)  # fast tokenizers write tokenizer.json
+
+def prepare_onnx(model_name: str = EMBED_MODEL, models_dir: str = MODELS_DIR, quantized: bool = False) -> Dict[str, str]:
+    """Make sure the ONNX model (and its int8 variant if asked) exist locally. Returns {"model": ..., "tokenizer": ...}."""
+    out_dir = _model_dir(model_name, models_dir)
+    fp32 = os.path.join(out_dir, "model.onnx")
+    int8 = os.path.join(out_dir, "model_int8.onnx")
+    tok = os.path.join(out_dir, "tokenizer.json")
+    os.makedirs(out_dir, exist_ok=True)
+
+    if not (os.path.exists(fp32) and os.path.exists(tok)):
+        try:
+            _download_onnx(model_name, out_dir)
+        except Exception as e:
+            log.info("ONNX download for %s failed (%s); exporting from the torch model", model_name, e)
+            try:
+                _export_onnx(model_name, out_dir)
+            except ImportError as export_error:
+                raise RuntimeError(
+                    f"Could not get an ONNX copy of {model_name}: the Hub download failed ({e}) and exporting it locally "
+                    f"needs torch and sentence-transformers ({export_error}). Fix the download (pip install huggingface_hub, "
+                    f"network access) or put model.onnx and tokenizer.json in {out_dir}."
+                ) from export_error
+
+    if quantized and not os.path.exists(int8):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        # weights -> int8, activations quantized on the fly; no calibration data needed
+        quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+
+    return {"model": int8 if quantized else fp32, "tokenizer": tok}
+
+# ---------- factory ----------
+
+@lru_cache(maxsize=4)
+def get_embedder(backend: Optional[str] = None, model_name: str = EMBED_MODEL) -> Embedder:
+    """Build (and cache) an embedder. backend=None uses $RAG_EMBEDDER, default 'torch'."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "torch":
+        return TorchEmbedder(model_name)
+    if backend == "onnx":
+        return OnnxEmbedder(model_name)
+    if backend == "onnx-int8":
+        return OnnxEmbedder(model_name, quantized=True)
+    raise ValueError(f"Unknown embedder backend {backend!r}; choose one of {', '.join(BACKENDS)}")
+
+def describe(model: Any) -> Dict[str, Any]:
+    """Metadata for an embedder or any object with a SentenceTransformer-style encode()."""
+    if isinstance(model, Embedder):
+        return model.info()
+    return {"backend": getattr(model, "backend", type(model).__name__), "model_name": getattr(model, "model_name", EMBED_MODEL)}
@@ -1,11 +1,19 @@
-
 import json
-from typing import List, Dict, Callable
+import re
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Callable, Optional
 from .chain import analyze, plan, generate
+from .ollama_client import chat_raw, content_of
+from .warmup import KeepAlive, COLD_LOAD_S, DEFAULT_KEEP_ALIVE, warm
 
 def must_include(text: str, substrings: List[str]) -> bool:
     return all(s.lower() in text.lower() for s in substrings)
 
+def must_not_include(text: str, substrings: List[str]) -> bool:
+    return not any(s.lower() in text.lower() for s in substrings)
+
 def is_json_like(s: str) -> bool:
     try:
         json.loads(s)
@@ -13,6 +21,31 @@ def is_json_like(s: str) -> bool:
     except Exception:
         return False
 
+def has_bullets(text: str) -> bool:
+    return re.search(r"(?m)^\s*(?:[-*•]|\d+[.)])\s+", text) is not None
+
+def max_chars(text: str, limit: int) -> bool:
+    return len(text) <= int(limit)
+
+def matches_regex(text: str, pattern: str) -> bool:
+    return re.search(pattern, text) is not None
+
+# Dataset check name -> fn(text, arg). Boolean-style checks compare against the arg,
+# so {"is_json_like": false} asserts the reply is NOT JSON.
+CHECKS: Dict[str, Callable[[str, Any], bool]] = {
+    "must_include": must_include,
+    "must_not_include": must_not_include,
+    "is_json_like": lambda text, want: is_json_like(text) == bool(want),
+    "has_bullets": lambda text, want: has_bullets(text) == bool(want),
+    "max_chars": max_chars,
+    "matches_regex": matches_regex,
+}
+
+JSON_RETRY_PROMPT = (
+    "Return ONLY strict JSON. No markdown or code fences. "
+    "Repeat your previous answer as valid JSON."
+)
+
 def run_basic_evals() -> Dict[str, bool]:
     results = {}
     analysis = analyze("Summarize key benefits of local LLMs.", context="Local models can be private and offline.")
@@ -25,3 +58,132 @@ def run_basic_evals() -> Dict[str, bool]:
     results["final_mentions_local"] = must_include(final, ["local"])
 
     return results
+
+# ---------- dataset-driven harness ----------
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    """
+    Read eval cases from JSONL. One case per line:
+      {"id": "...", "prompt": "...", "system": "...", "checks": {"must_include": ["local"], "is_json_like": true}}
+    Blank lines and lines starting with '#' are skipped. "live_only": true marks cases that test model knowledge
+    the echoing mock server can't have; scripts/run_evals.py --mock skips them.
+    """
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            case = json.loads(line)
+            if "id" not in case or "prompt" not in case:
+                raise ValueError(f"{path}:{lineno}: case needs 'id' and 'prompt'")
+            checks = case.get("checks", {})
+            unknown = set(checks) - set(CHECKS)
+            if unknown:
+                raise ValueError(f"{path}:{lineno}: unknown checks {sorted(unknown)}")
+            # check args are evaluated outside run_case's error handling, so a bad one would abort the whole run
+            for name in ("must_include", "must_not_include"):
+                arg = checks.get(name)
+                # a bare string would be checked character by character
+                if arg is not None and not (isinstance(arg, list) and all(isinstance(s, str) for s in arg)):
+                    raise ValueError(f"{path}:{lineno}: {name} needs a list of strings, got {arg!r}")
+            if "matches_regex" in checks:
+                try:
+                    re.compile(checks["matches_regex"])
+                except (re.error, TypeError) as e:
+                    raise ValueError(f"{path}:{lineno}: matches_regex is not a valid pattern: {e}")
+            if "max_chars" in checks and (not isinstance(checks["max_chars"], int) or isinstance(checks["max_chars"], bool)):
+                raise ValueError(f"{path}:{lineno}: max_chars needs an integer, got {checks['max_chars']!r}")
+            cases.append(case)
+    return cases
+
+def run_case(model: str, case: Dict[str, Any], trial: int = 0, host: Optional[str] = None, keep_alive: Optional[KeepAlive] = None) -> Dict[str, Any]:
+    """Run one case once. Cases that expect JSON get one corrective retry, like pipeline.py."""
+    msgs = []
+    if case.get("system"):
+        msgs.append({"role": "system", "content": case["system"]})
+    msgs.append({"role": "user", "content": case["prompt"]})
+    checks = case.get("checks", {})
+    temperature = case.get("temperature", 0.2)
+
+    result: Dict[str, Any] = {"id": case["id"], "model": model, "trial": trial, "retried": False, "error": None}
+    eval_count, eval_ns, load_ns = 0, 0, 0
+    t0 = time.perf_counter()
+    try:
+        data = chat_raw(model, msgs, temperature=temperature, host=host, keep_alive=keep_alive)
+        text = content_of(data)
+        eval_count += data.get("eval_count", 0) if isinstance(data, dict) else 0
+        eval_ns += data.get("eval_duration", 0) if isinstance(data, dict) else 0
+        load_ns += (data.get("load_duration") or 0) if isinstance(data, dict) else 0
+        if checks.get("is_json_like") is True and not is_json_like(text):
+            result["retried"] = True
+            retry_msgs = msgs + [
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": JSON_RETRY_PROMPT},
+            ]
+            data = chat_raw(model, retry_msgs, temperature=0.0, host=host, keep_alive=keep_alive)
+            text = content_of(data)
+            eval_count += data.get("eval_count", 0) if isinstance(data, dict) else 0
+            eval_ns += data.get("eval_duration", 0) if isinstance(data, dict) else 0
+            load_ns += (data.get("load_duration") or 0) if isinstance(data, dict) else 0
+    except Exception as e:
+        result.update(latency_s=time.perf_counter() - t0, passed=False, checks={}, error=str(e),
+                      eval_count=eval_count, eval_duration_ns=eval_ns, cold_load=load_ns / 1e9 >= COLD_LOAD_S)
+        return result
+
+    result["latency_s"] = time.perf_counter() - t0
+    result["checks"] = {name: bool(CHECKS[name](text, arg)) for name, arg in checks.items()}
+    result["passed"] = all(result["checks"].values())
+    result["eval_count"] = eval_count
+    result["eval_duration_ns"] = eval_ns
+    result["cold_load"] = load_ns / 1e9 >= COLD_LOAD_S
+    return result
+
+def run_dataset(cases: List[Dict[str, Any]], models: List[str], trials: int = 1, workers: int = 4, host: Optional[str] = None,
+                keep_alive: Optional[KeepAlive] = None, warm_first: bool = False) -> List[Dict[str, Any]]:
+    """
+    Run every (model, trial, case) combination on a pool of at most `workers` threads.
+    warm_first preloads the models so cold loads don't land in the latency numbers.
+    """
+    if warm_first:
+        # the server resets a model's expiry on every request, so the cases must send the same keep_alive as the warm-up
+        keep_alive = DEFAULT_KEEP_ALIVE if keep_alive is None else keep_alive
+        warm(models, keep_alive=keep_alive, host=host)
+    jobs = list(itertools.product(models, range(trials), cases))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_case, m, c, t, host, keep_alive) for m, t, c in jobs]
+        return [f.result() for f in futures]
+
+def _percentile(values: List[float], q: float) -> float:
+    # linear interpolation between closest ranks (same as numpy's default)
+    if not values:
+        return 0.0
+    vs = sorted(values)
+    pos = (len(vs) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(vs) - 1)
+    return vs[lo] + (vs[hi] - vs[lo]) * (pos - lo)
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-model pass rate, p50/p95 latency, tokens/s and JSON parse-retry rate."""
+    report: Dict[str, Dict[str, Any]] = {}
+    by_model: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        by_model.setdefault(r["model"], []).append(r)
+    for model, rs in by_model.items():
+        lat = [r["latency_s"] for r in rs]
+        tokens = sum(r["eval_count"] for r in rs)
+        eval_s = sum(r["eval_duration_ns"] for r in rs) / 1e9
+        # fall back to wall latency when the server doesn't report eval_duration
+        denom = eval_s if eval_s > 0 else sum(lat)
+        report[model] = {
+            "runs": len(rs),
+            "pass_rate": sum(1 for r in rs if r["passed"]) / len(rs),
+            "p50_latency_s": _percentile(lat, 0.50),
+            "p95_latency_s": _percentile(lat, 0.95),
+            "tokens_per_s": tokens / denom if denom > 0 else 0.0,
+            "retry_rate": sum(1 for r in rs if r["retried"]) / len(rs),
+            "errors": sum(1 for r in rs if r["error"]),
+            "cold_loads": sum(1 for r in rs if r["cold_load"]),
+        }
+    return report
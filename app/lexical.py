@@ -0,0 +1,164 @@
+"""
+Compact BM25 inverted index and hybrid (lexical -> dense) retrieval.
+
+BM25Index stores postings in CSR form: the sorted terms (one UTF-8 blob plus
+offsets, so a single long URL doesn't widen every slot), per-term posting
+offsets, and for every posting the doc number plus its precomputed BM25
+weight, so a query only sums a few slices. Saved as one .npz next to the FAISS
+index, tagged with the doc count and a fingerprint of the doc ids so a stale
+file is detected instead of returning wrong doc numbers.
+
+hybrid_search() shortlists candidates lexically, rescores them against the
+query embedding using the vectors already stored in the FAISS index (no full
+scan), and fuses the two scores. Exact identifiers and error strings rank
+where keyword search puts them; paraphrases still benefit from the dense score.
+"""
+import re
+import bisect
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_PART_RE = re.compile(r"[^\W_]+")
+_COMPOUND_RE = re.compile(r"\b[^\W_]+(?:[._\-:/][^\W_]+)+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens. Compound tokens like ERR_CONN_REFUSED, faiss.IndexFlatIP or 127.0.0.1:11434 are kept
+    whole (exact-match queries) as well as split into parts (so 'conn refused' still matches).
+    """
+    text = text.lower()
+    return _PART_RE.findall(text) + _COMPOUND_RE.findall(text)
+
+def corpus_key(doc_ids: List[str]) -> str:
+    """Fingerprint of the doc list an index was built over; order matters because postings store doc positions."""
+    return hashlib.blake2b("\0".join(doc_ids).encode("utf-8"), digest_size=16).hexdigest()
+
+class _Terms:
+    """Sorted terms as one UTF-8 blob plus offsets; a read-only sequence of bytes that bisect can search."""
+
+    def __init__(self, blob: bytes, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+class BM25Index:
+    def __init__(self, terms: _Terms, indptr: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray, n_docs: int, corpus: str = ""):
+        self.terms = terms      # term i's postings are [indptr[i], indptr[i+1])
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights  # BM25 contribution of the term to that doc
+        self.n_docs = n_docs
+        self.corpus = corpus    # corpus_key() of the doc ids, "" if built without them
+
+    @classmethod
+    def build(cls, texts: List[str], doc_ids: Optional[List[str]] = None, k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        n = len(texts)
+        ids: Dict[str, int] = {}
+        term_ids, docs, tfs = [], [], []
+        doc_len = np.zeros(n, dtype=np.float32)
+        for d, text in enumerate(texts):
+            tf = Counter(tokenize(text))
+            doc_len[d] = sum(tf.values())
+            term_ids.extend(ids.setdefault(term, len(ids)) for term in tf)
+            tfs.extend(tf.values())
+            docs.extend([d] * len(tf))
+        # renumber terms in sorted order so lookups can binary-search them
+        encoded = [term.encode("utf-8") for term in ids]
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        rank = np.empty(len(encoded), dtype=np.int64)
+        rank[order] = np.arange(len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(encoded[i]) for i in order], out=offsets[1:])
+        vocab = _Terms(b"".join(encoded[i] for i in order), offsets)
+        term_ids = rank[np.array(term_ids, dtype=np.int64)]
+        docs = np.array(docs, dtype=np.int32)
+        tf = np.array(tfs, dtype=np.float32)
+        order = np.lexsort((docs, term_ids))  # group postings by term, doc order within a term
+        term_ids, docs, tf = term_ids[order], docs[order], tf[order]
+
+        df = np.bincount(term_ids, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        avgdl = float(doc_len.mean()) if n and doc_len.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * doc_len / avgdl)
+        weights = idf[term_ids] * tf * (k1 + 1) / (tf + norm[docs])
+        return cls(vocab, indptr, docs, weights.astype(np.float32), n, corpus_key(doc_ids) if doc_ids is not None else "")
+
+    def save(self, path: str):
+        np.savez_compressed(path, term_blob=np.frombuffer(self.terms.blob, dtype=np.uint8), term_offsets=self.terms.offsets,
+                            indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights,
+                            n_docs=np.array(self.n_docs), corpus=np.array(self.corpus))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as z:
+            if "term_blob" not in z.files:
+                raise ValueError(f"{path}: unsupported BM25 index format; rebuild the index")
+            terms = _Terms(z["term_blob"].tobytes(), z["term_offsets"])
+            return cls(terms, z["indptr"], z["doc_ids"], z["weights"], int(z["n_docs"]), str(z["corpus"]))
+
+    def matches(self, n_docs: int, doc_ids: Optional[List[str]] = None) -> bool:
+        """True if this index was built over these docs (same count and, when known, the same ids in the same order)."""
+        if self.n_docs != n_docs:
+            return False
+        return doc_ids is None or not self.corpus or self.corpus == corpus_key(doc_ids)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        key = term.encode("utf-8")
+        t = bisect.bisect_left(self.terms, key)
+        if t >= len(self.terms) or self.terms[t] != key:
+            return self.doc_ids[:0], self.weights[:0]
+        lo, hi = self.indptr[t], self.indptr[t + 1]
+        return self.doc_ids[lo:hi], self.weights[lo:hi]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (doc number, BM25 score), best first. Cost scales with the query terms' postings, not the corpus."""
+        hits = [self._postings(term) for term in set(tokenize(query))]
+        hits = [h for h in hits if len(h[0])]
+        if not hits:
+            return []
+        if sum(len(h[0]) for h in hits) * 8 > self.n_docs:
+            # common terms: a dense score array is cheaper than merging long postings lists
+            # (doc ids are unique within a term, so plain fancy-index += is safe)
+            scores = np.zeros(self.n_docs, dtype=np.float32)
+            for ids, w in hits:
+                scores[ids] += w
+            docs = np.flatnonzero(scores)
+            scores = scores[docs]
+        else:
+            docs, inverse = np.unique(np.concatenate([h[0] for h in hits]), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate([h[1] for h in hits]))
+        top = np.argpartition(-scores, k - 1)[:k] if len(docs) > k else np.arange(len(docs))
+        top = top[np.argsort(-scores[top])]
+        return [(int(docs[i]), float(scores[i])) for i in top]
+
+def hybrid_search(query: str, qv: np.ndarray, index, bm25: BM25Index, k: int = 3, candidates: int = 100,
+                  alpha: float = 0.5) -> List[Tuple[int, float]]:
+    """
+    Lexical shortlist of `candidates` docs, dense rerank with the vectors stored in `index`, fused as
+    alpha * cosine + (1 - alpha) * bm25 / max_bm25. qv: normalized query embedding, shape (1, dim).
+    Returns [(doc number, fused score)], best first.
+    """
+    lex = bm25.search(query, candidates)
+    if len(lex) < k:
+        # too few keyword hits (e.g. a paraphrased question): top up from a dense scan
+        seen = {d for d, _ in lex}
+        _, idxs = index.search(qv, k)
+        lex += [(i, 0.0) for i in idxs[0].tolist() if i >= 0 and i not in seen]
+    if not lex:
+        return []
+    ids = np.array([d for d, _ in lex], dtype=np.int64)
+    bm = np.array([s for _, s in lex], dtype=np.float32)
+    dense = index.reconstruct_batch(ids) @ qv[0]
+    fused = alpha * dense + (1 - alpha) * (bm / bm.max() if bm.max() > 0 else bm)
+    order = np.argsort(-fused)[:k]
+    return [(int(ids[o]), float(fused[o])) for o in order]
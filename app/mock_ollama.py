@@ -0,0 +1,236 @@
+"""
+Stand-in Ollama server for CI and offline runs.
+
+Speaks just enough of the Ollama HTTP API (/api/chat, /api/generate preload,
+/api/ps, /api/tags) for the clients in this repo. Replies are deterministic
+(derived from the prompt) and timing is synthetic: a fixed per-request
+latency plus a token rate, and an optional cold-load delay for models that
+are not resident (honouring keep_alive), so eval numbers are reproducible
+without a real model.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_LATENCY_MS = 20.0
+DEFAULT_TOKENS_PER_S = 200.0
+DEFAULT_KEEP_ALIVE_S = 300.0
+
+def _parse_keep_alive(value: Any) -> float:
+    """Ollama keep_alive -> seconds. Numbers are seconds; strings like '30s', '5m', '1h'; negative = forever."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_S
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    m = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", str(value))
+    if not m:
+        return DEFAULT_KEEP_ALIVE_S
+    n = float(m.group(1))
+    if n < 0:
+        return float("inf")
+    return n * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[m.group(2)]
+
+def _filler(n_tokens: int, token_chars: int) -> List[str]:
+    # fixed-size payload: n_tokens words of roughly token_chars characters each
+    return [(f"tok{i % 1000}" + "x" * token_chars)[:max(token_chars, 1)] for i in range(n_tokens)]
+
+def _reply_for(messages: List[Dict[str, str]], reply_tokens: Optional[int] = None, token_chars: int = 4) -> str:
+    """Canned reply: JSON if the conversation asks for JSON, bullets otherwise.
+
+    With reply_tokens set, the reply body is a fixed-size filler payload instead of an echo of the prompt.
+    """
+    text = "\n".join(m.get("content", "") for m in messages)
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = re.findall(r"[A-Za-z0-9']+", user)[:24]
+    if reply_tokens is not None:
+        words = _filler(reply_tokens, token_chars)
+        if "json" in text.lower():
+            return json.dumps({"analysis": words[:4], "plan": words[4:8], "output": " ".join(words)})
+        return " ".join(words)
+    if "json" in text.lower():
+        return json.dumps({
+            "analysis": [" ".join(words[:8])],
+            "plan": ["step " + w for w in words[:3]],
+            "output": " ".join(words),
+        })
+    lines = [" ".join(words[i:i + 6]) for i in range(0, len(words), 6)] or ["ok"]
+    return "\n".join(f"- {ln}" for ln in lines)
+
+def _tokens(text: str) -> List[str]:
+    # whitespace-preserving split so joined chunks == original text
+    return re.findall(r"\s*\S+", text) or [text]
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    server: "MockOllamaServer"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b"{}"
+        try:
+            return json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": m} for m in self.server.models]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": self.server.running()})
+        else:
+            self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+    def do_POST(self):
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+            return
+        req = self._read_json()
+        model = req.get("model", "")
+        if not model:
+            self._send_json({"error": "model is required"}, status=400)
+            return
+        keep_alive_s = _parse_keep_alive(req.get("keep_alive"))
+        if keep_alive_s == 0:
+            self.server.unload(model)
+            self._send_json({"model": model, "done": True, "done_reason": "unload"})
+            return
+        load_ns = self.server.touch(model, keep_alive_s)
+        if self.path == "/api/generate":
+            # only the preload form (no prompt) is supported
+            self._send_json({"model": model, "response": "", "done": True, "done_reason": "load",
+                             "load_duration": load_ns, "total_duration": load_ns})
+            return
+        reply = _reply_for(req.get("messages") or [], self.server.reply_tokens, self.server.token_chars)
+        tokens = _tokens(reply)
+        if req.get("stream", True):
+            self._stream(model, tokens, load_ns)
+        else:
+            self._complete(model, tokens, load_ns)
+
+    def _stats(self, n_tokens: int, eval_ns: int, load_ns: int = 0) -> Dict[str, Any]:
+        latency_ns = int(self.server.latency_ms * 1e6)
+        return {
+            "done": True,
+            "total_duration": load_ns + latency_ns + eval_ns,
+            "load_duration": load_ns,
+            "prompt_eval_count": 0,
+            "eval_count": n_tokens,
+            "eval_duration": eval_ns,
+        }
+
+    def _complete(self, model: str, tokens: List[str], load_ns: int = 0):
+        t0 = time.perf_counter()
+        time.sleep(self.server.latency_ms / 1000.0 + len(tokens) * self.server.token_delay_s)
+        eval_ns = int((time.perf_counter() - t0) * 1e9) - int(self.server.latency_ms * 1e6)
+        out = {"model": model, "message": {"role": "assistant", "content": "".join(tokens)}}
+        out.update(self._stats(len(tokens), max(eval_ns, 1), load_ns))
+        self._send_json(out)
+
+    def _stream(self, model: str, tokens: List[str], load_ns: int = 0):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        time.sleep(self.server.latency_ms / 1000.0)
+        t0 = time.perf_counter()
+        for tok in tokens:
+            if self.server.token_delay_s:
+                time.sleep(self.server.token_delay_s)
+            line = {"model": model, "message": {"role": "assistant", "content": tok}, "done": False}
+            self.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+        final = {"model": model, "message": {"role": "assistant", "content": ""}}
+        final.update(self._stats(len(tokens), max(int((time.perf_counter() - t0) * 1e9), 1), load_ns))
+        self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+class MockOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr: Tuple[str, int], latency_ms: float = DEFAULT_LATENCY_MS, tokens_per_s: float = DEFAULT_TOKENS_PER_S, reply_tokens: Optional[int] = None, token_chars: int = 4, load_ms: float = 0.0, models: Optional[List[str]] = None, verbose: bool = False):
+        super().__init__(addr, MockOllamaHandler)
+        self.latency_ms = latency_ms
+        # tokens_per_s <= 0 streams as fast as the socket allows
+        self.token_delay_s = 1.0 / tokens_per_s if tokens_per_s > 0 else 0.0
+        self.reply_tokens = reply_tokens
+        self.token_chars = token_chars
+        self.load_ms = load_ms
+        self.models = models or ["mock"]
+        self.verbose = verbose
+        # model -> monotonic expiry time; mirrors what a real server keeps resident
+        self._resident: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, model: str, keep_alive_s: float) -> int:
+        """Mark model resident for keep_alive_s. Returns the simulated load time in ns (0 if already warm)."""
+        # loads happen under the lock, so concurrent requests queue behind a load like on a real server
+        with self._lock:
+            cold = self._resident.get(model, 0.0) <= time.monotonic()
+            if cold and self.load_ms:
+                time.sleep(self.load_ms / 1000.0)
+            self._resident[model] = time.monotonic() + keep_alive_s
+        return int(self.load_ms * 1e6) if cold else 0
+
+    def unload(self, model: str):
+        with self._lock:
+            self._resident.pop(model, None)
+
+    def running(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for model, expires in self._resident.items():
+                if expires <= now:
+                    continue
+                if expires == float("inf"):
+                    expires_at = "2318-01-01T00:00:00Z"
+                else:
+                    expires_at = (datetime.now(timezone.utc) + timedelta(seconds=expires - now)).isoformat()
+                out.append({"name": model, "model": model, "size": 0, "size_vram": 0, "expires_at": expires_at})
+        return out
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **kwargs) -> MockOllamaServer:
+    """Start a MockOllamaServer on a background thread. port=0 picks a free port; see .url."""
+    server = MockOllamaServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Run a stand-in Ollama server.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=11435)
+    p.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    p.add_argument("--tokens-per-s", type=float, default=DEFAULT_TOKENS_PER_S, help="0 = unthrottled")
+    p.add_argument("--reply-tokens", type=int, default=None, help="Fixed reply size instead of echoing the prompt")
+    p.add_argument("--token-chars", type=int, default=4)
+    p.add_argument("--load-ms", type=float, default=0.0, help="Simulated cold-load time for non-resident models")
+    p.add_argument("--verbose", action="store_true")
+    args = p.parse_args()
+
+    srv = MockOllamaServer((args.host, args.port), latency_ms=args.latency_ms, tokens_per_s=args.tokens_per_s,
+                           reply_tokens=args.reply_tokens, token_chars=args.token_chars, load_ms=args.load_ms,
+                           verbose=args.verbose)
+    print(f"Mock Ollama listening on {srv.url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,10 +1,15 @@
-
+import os
 import requests
 from typing import List, Dict, Any, Optional
+from .warmup import KeepAlive, normalize_keep_alive, log_cold_load
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_URL = f"{OLLAMA_HOST}/api/chat"
+# Default keep_alive sent with every request when the caller doesn't pass one (unset = server default)
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE")
 
-def chat(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, top_p: float = 0.9, stream: bool = False) -> str:
+def chat_raw(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, top_p: float = 0.9, stream: bool = False, host: Optional[str] = None, keep_alive: Optional[KeepAlive] = None) -> Dict[str, Any]:
+    """Like chat(), but returns the full response dict (eval_count, durations, ...)."""
     payload = {
         "model": model,
         "messages": messages,
@@ -14,9 +19,19 @@ def chat(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, t
         },
         "stream": stream
     }
-    resp = requests.post(OLLAMA_URL, json=payload, timeout=120)
+    if keep_alive is None:
+        keep_alive = KEEP_ALIVE
+    if keep_alive is not None:
+        payload["keep_alive"] = normalize_keep_alive(keep_alive)
+    url = f"{host.rstrip('/')}/api/chat" if host else OLLAMA_URL
+    resp = requests.post(url, json=payload, timeout=120)
     resp.raise_for_status()
     data = resp.json()
+    if isinstance(data, dict):
+        log_cold_load(model, data.get("load_duration"))
+    return data
+
+def content_of(data: Any) -> str:
     # Ollama returns a dict with 'message':{'content':...} for non-stream
     if isinstance(data, dict) and 'message' in data and 'content' in data['message']:
         return data['message']['content']
@@ -24,3 +39,7 @@ def chat(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, t
     if isinstance(data, dict) and 'content' in data:
         return data['content']
     return str(data)
+
+def chat(model: str, messages: List[Dict[str, str]], temperature: float = 0.2, top_p: float = 0.9, stream: bool = False, keep_alive: Optional[KeepAlive] = None) -> str:
+    data = chat_raw(model, messages, temperature=temperature, top_p=top_p, stream=stream, keep_alive=keep_alive)
+    return content_of(data)
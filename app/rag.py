@@ -1,51 +1,137 @@
-
 import os
 import json
+import time
+import logging
 import faiss
 import numpy as np
-from typing import List, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import Dict, List, Optional, Tuple
+from .embedders import EMBED_MODEL, DEFAULT_BACKEND, get_embedder, describe
+from .dedup import dedup_docs
+from .lexical import BM25Index, hybrid_search
+
+log = logging.getLogger(__name__)
 
-EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+QUERY_MODES = ("dense", "hybrid", "lexical")
 
 class RAGIndex:
-    def __init__(self, index_path: str = "data/index.faiss", meta_path: str = "data/meta.json"):
+    def __init__(self, index_path: str = "data/index.faiss", meta_path: str = "data/meta.json", model=None, backend: Optional[str] = None,
+                 bm25_path: Optional[str] = None):
         self.index_path = index_path
         self.meta_path = meta_path
-        self.model = SentenceTransformer(EMBED_MODEL)
+        # BM25 inverted index written next to the FAISS index (data/index.bm25.npz by default)
+        self.bm25_path = bm25_path or os.path.splitext(index_path)[0] + ".bm25.npz"
+        # model: anything with SentenceTransformer's encode(texts, normalize_embeddings=...).
+        # If omitted, an embedder is built on first use from `backend`, else the backend recorded in the index, else $RAG_EMBEDDER.
+        self.model = model
+        self.backend = backend
         self.index = None
+        self.bm25: Optional[BM25Index] = None
         self.meta: List[dict] = []
+        self.embedder_info: dict = {}
+        self.dedup_report: dict = {}
+
+    def _embedder(self):
+        if self.model is None:
+            backend = self.backend or self.embedder_info.get("backend")
+            self.model = get_embedder(backend, self.embedder_info.get("model_name", EMBED_MODEL))
+        return self.model
 
     def _encode(self, texts: List[str]) -> np.ndarray:
-        emb = self.model.encode(texts, normalize_embeddings=True)
+        emb = self._embedder().encode(texts, normalize_embeddings=True)
         return np.array(emb, dtype="float32")
 
-    def build(self, docs: List[Tuple[str,str]]):
-        # docs: list of (doc_id, text)
-        vectors = self._encode([t for _, t in docs])
+    def build(self, docs: List[Tuple[str,str]], vectors: Optional[np.ndarray] = None, dedup: Optional[float] = None,
+              aliases: Optional[Dict[str, List[str]]] = None):
+        # docs: list of (doc_id, text); vectors: optional precomputed L2-normalized embeddings, one row per doc
+        # dedup: drop near-duplicates (shingle Jaccard >= dedup) before embedding; aliases: canonical id -> dropped ids
+        aliases = dict(aliases or {})
+        result = None
+        if dedup is not None:
+            result = dedup_docs(docs, threshold=dedup)
+            docs = result.docs
+            vectors = None if vectors is None else vectors[result.kept]
+            aliases.update(result.aliases)
+        embed_s = None
+        if vectors is None:
+            t0 = time.perf_counter()
+            vectors = self._encode([t for _, t in docs])
+            embed_s = time.perf_counter() - t0
+        self.dedup_report = dict(result.report(embed_s), threshold=dedup) if result is not None else {}
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
         dim = vectors.shape[1]
         self.index = faiss.IndexFlatIP(dim)
         self.index.add(vectors)
         self.meta = [{"id": did, "text": txt} for (did, txt) in docs]
+        for doc in self.meta:
+            if doc["id"] in aliases:
+                doc["aliases"] = aliases[doc["id"]]
+        if self.model is not None:
+            info = describe(self.model)
+        else:  # precomputed vectors: trust the backend we were told
+            info = {"backend": self.backend or DEFAULT_BACKEND, "model_name": EMBED_MODEL}
+        self.embedder_info = dict(info, dim=dim)
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
         faiss.write_index(self.index, self.index_path)
+        self.bm25 = BM25Index.build([d["text"] for d in self.meta], doc_ids=[d["id"] for d in self.meta])
+        self.bm25.save(self.bm25_path)
         with open(self.meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+            data = {"embedder": self.embedder_info, "docs": self.meta}
+            if self.dedup_report:
+                data["dedup"] = self.dedup_report
+            json.dump(data, f, ensure_ascii=False, indent=2)
 
     def load(self):
         self.index = faiss.read_index(self.index_path)
         with open(self.meta_path, "r", encoding="utf-8") as f:
-            self.meta = json.load(f)
+            data = json.load(f)
+        # older indexes stored just the doc list (always built with the torch backend)
+        if isinstance(data, list):
+            self.meta, self.embedder_info = data, {"backend": "torch", "model_name": EMBED_MODEL}
+        else:
+            self.meta, self.embedder_info = data["docs"], data.get("embedder", {})
+        self.bm25 = None  # loaded on the first hybrid/lexical query
+        recorded = self.embedder_info.get("backend")
+        current = self.backend or (describe(self.model)["backend"] if self.model is not None else None)
+        if recorded and current and current != recorded:
+            log.warning("index %s was built with the %r embedder but is being queried with %r", self.index_path, recorded, current)
+
+    def _lexical(self) -> BM25Index:
+        if self.bm25 is None:
+            ids = [d["id"] for d in self.meta]
+            bm25 = None
+            if os.path.exists(self.bm25_path):
+                try:
+                    bm25 = BM25Index.load(self.bm25_path)
+                except ValueError as e:
+                    log.warning("%s", e)
+                # a leftover file from an earlier build would map hits to the wrong doc numbers
+                if bm25 is not None and not (bm25.matches(self.index.ntotal, ids) and self.index.ntotal == len(ids)):
+                    log.warning("BM25 index %s does not match %s; rebuilding it in memory", self.bm25_path, self.index_path)
+                    bm25 = None
+            if bm25 is None:
+                # missing (index built before BM25 existed) or stale: the texts are in meta, so build it in memory
+                log.info("building a BM25 index from %d docs", len(self.meta))
+                bm25 = BM25Index.build([d["text"] for d in self.meta], doc_ids=ids)
+            self.bm25 = bm25
+        return self.bm25
 
-    def query(self, question: str, k: int = 3):
+    def query(self, question: str, k: int = 3, mode: str = "dense", candidates: int = 100, alpha: float = 0.5):
+        # mode: dense = full FAISS scan; lexical = BM25 only (no embedding);
+        # hybrid = BM25 shortlist of `candidates`, reranked by cosine with the stored vectors (weight alpha)
+        if mode not in QUERY_MODES:
+            raise ValueError(f"unknown query mode {mode!r}; expected one of {QUERY_MODES}")
         if self.index is None or not self.meta:
             self.load()
+        if mode == "lexical":
+            return [self.meta[i] for i, _ in self._lexical().search(question, k)]
         qv = self._encode([question])
+        if mode == "hybrid":
+            return [self.meta[i] for i, _ in hybrid_search(question, qv, self.index, self._lexical(), k, candidates, alpha)]
         scores, idxs = self.index.search(qv, k)  # inner product, higher is better
         idxs = idxs[0].tolist()
         out = []
         for i in idxs:
-            if i < 0: 
+            if i < 0:
                 continue
             out.append(self.meta[i])
         return out
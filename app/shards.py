@@ -0,0 +1,226 @@
+"""
+Sharded FAISS index with scatter-gather search.
+
+Layout: one directory holding N independent shards,
+  shard_000_of_004.faiss / shard_000_of_004.json   (same formats as RAGIndex)
+Docs are assigned to shards by a stable hash of their id, so each shard can be
+built on its own (another process or machine) with build_shard().
+
+ShardedRAGIndex encodes the query once, fans the vector out to a pool of worker
+processes that each own a subset of the shards (loaded once, kept in that
+worker's memory), and merges their per-shard top-k by score.
+"""
+import os
+import re
+import glob
+import heapq
+import hashlib
+import multiprocessing as mp
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .rag import RAGIndex
+from .embedders import EMBED_MODEL, get_embedder
+
+SHARD_RE = re.compile(r"shard_(\d+)_of_(\d+)\.faiss$")
+
+def shard_of(doc_id: str, n_shards: int) -> int:
+    """Stable shard assignment (unlike hash(), identical across processes and machines)."""
+    h = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "little") % n_shards
+
+def shard_paths(shard_dir: str, shard_id: int, n_shards: int) -> Tuple[str, str]:
+    stem = os.path.join(shard_dir, f"shard_{shard_id:03d}_of_{n_shards:03d}")
+    return stem + ".faiss", stem + ".json"
+
+def build_shard(docs: List[Tuple[str, str]], shard_dir: str, shard_id: int, n_shards: int, model=None, backend: Optional[str] = None,
+                vectors: Optional[np.ndarray] = None, aliases: Optional[Dict[str, List[str]]] = None) -> int:
+    """
+    Build one shard from the docs that hash to `shard_id`. `docs` may be the full corpus;
+    other shards' docs are skipped. Returns the number of docs written.
+    To dedup, run app.dedup.dedup_docs on the full corpus first (it is deterministic, so
+    independently built shards agree) and pass its docs and aliases here.
+    """
+    keep = [i for i, (did, _) in enumerate(docs) if shard_of(did, n_shards) == shard_id]
+    index_path, meta_path = shard_paths(shard_dir, shard_id, n_shards)
+    idx = RAGIndex(index_path=index_path, meta_path=meta_path, model=model, backend=backend)
+    idx.build([docs[i] for i in keep], vectors=None if vectors is None else vectors[keep], aliases=aliases)
+    return len(keep)
+
+SHARD_FILE_RE = re.compile(r"shard_\d+_of_(\d+)\.(?:faiss|json|bm25\.npz)$")
+
+def remove_other_layouts(shard_dir: str, n_shards: int) -> List[str]:
+    """Delete shard files (index, meta, BM25) left by a build with a different shard count. Returns the removed paths."""
+    removed = []
+    for path in glob.glob(os.path.join(shard_dir, "shard_*_of_*.*")):
+        m = SHARD_FILE_RE.search(os.path.basename(path))
+        if m and int(m.group(1)) != n_shards:
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+def build_sharded(docs: List[Tuple[str, str]], shard_dir: str, n_shards: int, model=None, backend: Optional[str] = None,
+                  vectors: Optional[np.ndarray] = None, aliases: Optional[Dict[str, List[str]]] = None) -> List[int]:
+    """
+    Build all shards in this process. Embeds the corpus once, then splits it. Replaces any layout with a different
+    shard count in shard_dir (otherwise find_shards would refuse the mix); build_shard alone never deletes.
+    """
+    if vectors is None:
+        vectors = RAGIndex(model=model, backend=backend)._encode([t for _, t in docs])
+    sizes = [build_shard(docs, shard_dir, s, n_shards, model=model, backend=backend, vectors=vectors, aliases=aliases)
+             for s in range(n_shards)]
+    remove_other_layouts(shard_dir, n_shards)
+    return sizes
+
+def find_shards(shard_dir: str) -> List[Tuple[str, str]]:
+    """(index_path, meta_path) for every shard in shard_dir; all must agree on the shard count."""
+    found = {}
+    counts = set()
+    for path in glob.glob(os.path.join(shard_dir, "shard_*_of_*.faiss")):
+        m = SHARD_RE.search(os.path.basename(path))
+        if m:
+            found[int(m.group(1))] = path
+            counts.add(int(m.group(2)))
+    if not found:
+        raise FileNotFoundError(f"No shards in {shard_dir}. Build them with scripts/build_index.py --shards N")
+    if len(counts) > 1:
+        raise ValueError(f"{shard_dir} mixes shard layouts ({sorted(counts)} shards); rebuild or clean it")
+    n = counts.pop()
+    missing = sorted(set(range(n)) - set(found))
+    if missing:
+        raise FileNotFoundError(f"{shard_dir} is missing shard(s) {missing} of {n}")
+    return [(found[i], found[i][:-len(".faiss")] + ".json") for i in range(n)]
+
+# ---------- worker processes ----------
+
+def _shard_worker(paths: List[Tuple[str, str]], conn):
+    import faiss
+    # parallelism comes from the worker pool; one BLAS/OpenMP thread each avoids oversubscription
+    faiss.omp_set_num_threads(1)
+    shards = []
+    info: Dict[str, Any] = {}
+    dims: Dict[str, int] = {}
+    n_docs = 0
+    for index_path, meta_path in paths:
+        idx = RAGIndex(index_path=index_path, meta_path=meta_path)
+        idx.load()  # the embedder is lazy, so workers never load one
+        shards.append((idx.index, idx.meta))
+        info = info or idx.embedder_info
+        dims[os.path.basename(index_path)] = idx.index.d
+        n_docs += len(idx.meta)
+    conn.send(("ready", info, n_docs, dims))
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        qv, k = msg
+        try:
+            hits: List[List[Tuple[float, dict]]] = [[] for _ in range(len(qv))]
+            for index, meta in shards:
+                scores, ids = index.search(qv, k)
+                for qi in range(len(qv)):
+                    hits[qi].extend((float(s), meta[i]) for s, i in zip(scores[qi], ids[qi]) if i >= 0)
+            # only this worker's top-k goes back over the pipe
+            conn.send(("ok", [heapq.nlargest(k, h, key=lambda x: x[0]) for h in hits]))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+class ShardedRAGIndex:
+    """Same query()/load() surface as RAGIndex, backed by a directory of shards and worker processes."""
+
+    def __init__(self, shard_dir: str = "data/shards", workers: Optional[int] = None, model=None, backend: Optional[str] = None):
+        self.shard_dir = shard_dir
+        self.workers = workers
+        self.model = model
+        self.backend = backend
+        self.embedder_info: Dict[str, Any] = {}
+        self.num_docs = 0
+        self._procs: List[Any] = []
+        self._conns: List[Any] = []
+
+    def load(self):
+        if self._procs:
+            return
+        shards = find_shards(self.shard_dir)
+        n_workers = max(1, min(self.workers or os.cpu_count() or 1, len(shards)))
+        # round-robin so every worker holds about the same number of docs
+        assignment = [shards[w::n_workers] for w in range(n_workers)]
+        ctx = mp.get_context("spawn")  # fork is unavailable on Windows and unsafe with OpenMP
+        for paths in assignment:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_shard_worker, args=(paths, child), daemon=True)
+            proc.start()
+            self._procs.append(proc)
+            self._conns.append(parent)
+        self.num_docs = 0
+        dims: Dict[str, int] = {}
+        for w in range(len(self._conns)):
+            _, info, n, worker_dims = self._recv(w)
+            self.embedder_info = self.embedder_info or info
+            self.num_docs += n
+            dims.update(worker_dims)
+        if len(set(dims.values())) > 1:
+            self.close()
+            raise ValueError(f"shards in {self.shard_dir} disagree on the embedding dimension {dims}; rebuild them with one embedder")
+
+    def _worker_died(self, w: int, cause: Exception):
+        """A dead worker (crash, OOM kill, unreadable shard) becomes a readable error instead of EOFError."""
+        self._procs[w].join(timeout=1)
+        code = self._procs[w].exitcode
+        self.close()
+        raise RuntimeError(f"shard worker {w} for {self.shard_dir} died (exit code {code}); "
+                           f"check that its shards load on their own with RAGIndex") from cause
+
+    def _recv(self, w: int) -> Any:
+        try:
+            return self._conns[w].recv()
+        except (EOFError, OSError) as e:
+            self._worker_died(w, e)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self.model is None:
+            backend = self.backend or self.embedder_info.get("backend")
+            self.model = get_embedder(backend, self.embedder_info.get("model_name", EMBED_MODEL))
+        return np.array(self.model.encode(texts, normalize_embeddings=True), dtype="float32")
+
+    def search_vectors(self, qv: np.ndarray, k: int = 3) -> List[List[Tuple[float, dict]]]:
+        """Scatter query vectors to all workers, gather and merge their top-k. Returns [(score, doc), ...] per query."""
+        self.load()
+        qv = np.ascontiguousarray(qv, dtype="float32")
+        for w, conn in enumerate(self._conns):
+            try:
+                conn.send((qv, k))
+            except OSError as e:  # BrokenPipeError included
+                self._worker_died(w, e)
+        replies = [self._recv(w) for w in range(len(self._conns))]  # drain every worker before raising
+        errors = [f"worker {w}: {payload}" for w, (status, payload) in enumerate(replies) if status != "ok"]
+        if errors:
+            raise RuntimeError(f"shard search failed in {self.shard_dir}: " + "; ".join(errors))
+        partials = [payload for _, payload in replies]
+        return [heapq.nlargest(k, (h for p in partials for h in p[qi]), key=lambda x: x[0]) for qi in range(len(qv))]
+
+    def query_batch(self, questions: List[str], k: int = 3) -> List[List[dict]]:
+        self.load()
+        return [[doc for _, doc in hits] for hits in self.search_vectors(self._encode(questions), k)]
+
+    def query(self, question: str, k: int = 3) -> List[dict]:
+        return self.query_batch([question], k)[0]
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._procs, self._conns = [], []
+
+    def __enter__(self):
+        self.load()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,83 @@
+"""
+Model preloading and keep-alive management.
+
+Ollama unloads idle models (default after 5 minutes), so the next request
+pays `load_duration` again — tens of seconds on CPU. preload() loads a model
+and pins it for `keep_alive`; running() reads /api/ps to show what is
+resident; log_cold_load() lets clients flag requests that hit a cold load.
+"""
+import os
+import logging
+import requests
+from typing import Any, Dict, List, Optional, Union
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+KeepAlive = Union[str, int, float]
+
+def normalize_keep_alive(value: KeepAlive) -> KeepAlive:
+    """Ollama wants bare numbers as JSON numbers (seconds); "-1" or "3600" from the CLI/env would be rejected as strings."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value.strip()
+    return value
+
+# Same name as the server-side setting. Durations like "30m", seconds, or -1 (stay loaded).
+DEFAULT_KEEP_ALIVE = normalize_keep_alive(os.environ.get("OLLAMA_KEEP_ALIVE", "30m"))
+# Warm requests report load_duration of a few ms; anything above this was a real load.
+COLD_LOAD_S = 0.5
+
+log = logging.getLogger(__name__)
+
+def _base(host: Optional[str]) -> str:
+    return (host or OLLAMA_HOST).rstrip("/")
+
+def _raise_for_ollama_errors(data: Any):
+    if isinstance(data, dict) and "error" in data:
+        raise RuntimeError(f"Ollama error: {data['error']}")
+
+def preload(model: str, keep_alive: KeepAlive = DEFAULT_KEEP_ALIVE, host: Optional[str] = None, timeout: int = 600) -> float:
+    """Load `model` and keep it resident for `keep_alive`. Returns the load time in seconds (~0 if already warm)."""
+    # /api/generate with no prompt only loads the model
+    resp = requests.post(f"{_base(host)}/api/generate", json={"model": model, "keep_alive": normalize_keep_alive(keep_alive)}, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    _raise_for_ollama_errors(data)
+    return (data.get("load_duration") or 0) / 1e9
+
+def unload(model: str, host: Optional[str] = None):
+    preload(model, keep_alive=0, host=host)
+
+def running(host: Optional[str] = None, timeout: int = 10) -> List[Dict[str, Any]]:
+    """Models currently resident on the server (/api/ps)."""
+    resp = requests.get(f"{_base(host)}/api/ps", timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    _raise_for_ollama_errors(data)
+    return data.get("models") or []
+
+def warm(models: List[str], keep_alive: KeepAlive = DEFAULT_KEEP_ALIVE, host: Optional[str] = None) -> Dict[str, float]:
+    """Preload each model and pin it for keep_alive. Returns {model: load seconds}."""
+    resident = {m.get("name") for m in running(host=host)}
+    loads = {}
+    for model in models:
+        # preload even resident models so keep_alive is refreshed and can't expire mid-batch
+        loads[model] = preload(model, keep_alive=keep_alive, host=host)
+        if model in resident:
+            log.info("%s already resident; keep_alive=%s", model, keep_alive)
+        else:
+            log.info("loaded %s in %.1fs; keep_alive=%s", model, loads[model], keep_alive)
+    return loads
+
+def log_cold_load(model: str, load_duration_ns: Optional[int]) -> bool:
+    """Log a warning if a response's load_duration shows the model was loaded for this request."""
+    load_s = (load_duration_ns or 0) / 1e9
+    if load_s < COLD_LOAD_S:
+        return False
+    log.warning("cold load: %s took %.1fs to load before answering (warm it with scripts/warmup.py or raise keep_alive)", model, load_s)
+    return True
@@ -3,8 +3,12 @@ import os
 import json
 import requests
 
+from app.warmup import normalize_keep_alive, log_cold_load
+
 BASE_URL = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 CHAT_URL = f"{BASE_URL}/api/chat"
+# Optional: how long the server keeps the model loaded after a request (e.g. "30m", -1 = forever)
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE")
 
 def _raise_for_ollama_errors(data):
     # Ollama returns {"error": "..."} on errors
@@ -27,7 +31,11 @@ def chat(messages, model="mistral", stream=False, temperature=0.7, num_predict=2
             "num_predict": num_predict,
         },
     }
+    if KEEP_ALIVE is not None:
+        payload["keep_alive"] = KEEP_ALIVE
     payload.update(kwargs)
+    if "keep_alive" in payload:
+        payload["keep_alive"] = normalize_keep_alive(payload["keep_alive"])
 
     resp = requests.post(CHAT_URL, json=payload, stream=stream, timeout=timeout)
     resp.raise_for_status()
@@ -35,6 +43,7 @@ def chat(messages, model="mistral", stream=False, temperature=0.7, num_predict=2
     if not stream:
         data = resp.json()
         _raise_for_ollama_errors(data)
+        log_cold_load(model, data.get("load_duration"))
         content = (data.get("message") or {}).get("content", "")
         if not content:
             # Surface the raw response so callers see what's wrong
@@ -57,6 +66,7 @@ def chat(messages, model="mistral", stream=False, temperature=0.7, num_predict=2
                 any_yield = True
                 yield msg["content"]
             if chunk.get("done"):
+                log_cold_load(model, chunk.get("load_duration"))
                 break
         if not any_yield:
             raise RuntimeError("Streaming produced no chunks.")
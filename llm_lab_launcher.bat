@@ -4,12 +4,16 @@ setlocal EnableDelayedExpansion
 rem === CONFIG (edit if needed) ===============================================
 set "OLLAMA_DIR=C:\Users\Veteran\AppData\Local\Programs\Ollama"
 set "MODEL=mistral:7b"
+rem How long Ollama keeps the model loaded after a request (e.g. 30m, 2h, -1 = until restart)
+set "KEEP_ALIVE=30m"
 set "LAB_DIR=%~dp0"
 set "VENV_DIR=%LAB_DIR%.venv"
 rem ===========================================================================
 
 rem Helper: add Ollama to PATH for this session
 set "PATH=%PATH%;%OLLAMA_DIR%"
+rem Python clients (llm.py, app\ollama_client.py, pipeline.py) send this keep_alive with each request
+set "OLLAMA_KEEP_ALIVE=%KEEP_ALIVE%"
 
 :main_menu
 cls
@@ -31,9 +35,10 @@ echo  8) Build RAG index (data/sample_docs)
 echo  9) Ask RAG question (prompt)
 echo 10) Run evals
 echo 11) Change model (e.g., mistral:7b-instruct) [session]
-echo 12) Exit
+echo 12) Warm model + show resident models
+echo 13) Exit
 echo ============================================================
-set /p CHOICE=Select an option (1-12): 
+set /p CHOICE=Select an option (1-13): 
 
 if "%CHOICE%"=="1" goto check_ollama
 if "%CHOICE%"=="2" goto start_server
@@ -46,7 +51,8 @@ if "%CHOICE%"=="8" goto build_rag
 if "%CHOICE%"=="9" goto ask_rag
 if "%CHOICE%"=="10" goto run_evals
 if "%CHOICE%"=="11" goto change_model
-if "%CHOICE%"=="12" goto end
+if "%CHOICE%"=="12" goto warm_model
+if "%CHOICE%"=="13" goto end
 echo Invalid choice.
 pause
 goto main_menu
@@ -178,11 +184,27 @@ if "%NEWMODEL%"=="" (
   echo No change made.
 ) else (
   set "MODEL=%NEWMODEL%"
-  echo Model set to: %MODEL%
+  echo Model set to: !MODEL!
+  call :warm "!MODEL!"
 )
 pause
 goto main_menu
 
+:warm_model
+echo.
+call :warm "%MODEL%"
+pause
+goto main_menu
+
+rem Preload %1 and pin it for KEEP_ALIVE so the next request skips the cold load
+:warm
+if exist "%VENV_DIR%\Scripts\activate.bat" call "%VENV_DIR%\Scripts\activate"
+echo Warming %~1 (keep_alive=%KEEP_ALIVE%)...
+pushd "%LAB_DIR%"
+python -m scripts.warmup --models "%~1" --keep-alive "%KEEP_ALIVE%"
+popd
+exit /b 0
+
 :end
 echo Bye!
 endlocal
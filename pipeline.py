@@ -9,10 +9,16 @@ import json
 from typing import Any, Dict, List, Tuple, Optional
 from ollama import Client
 
+from app.warmup import DEFAULT_KEEP_ALIVE, KeepAlive, normalize_keep_alive, log_cold_load, warm
+
 # Use an actually-installed default model; override with OLLAMA_MODEL env var.
 MODEL = os.getenv("OLLAMA_MODEL", "phi3:mini")  # or "llama3:8b", "mistral:latest"
 HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
 TIMEOUT_S = 120
+# How long the server keeps MODEL loaded between calls (e.g. "30m", -1 = forever); unset = server default.
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE")
+# Preload MODEL before run() so the first call doesn't pay the cold load.
+WARM = os.getenv("OLLAMA_WARM", "0") == "1"
 
 # === hardened system prompt with authoritative facts ===
 GEN_SYS = (
@@ -196,7 +202,11 @@ def _loads_or_explain(label: str, text: str) -> Dict[str, Any]:
 
 # ---------- Model call ----------
 
-def _complete_json(system: str, prompt: str, model: str = MODEL) -> Dict[str, Any]:
+def _chat_kwargs(keep_alive: Optional[KeepAlive] = None) -> Dict[str, Any]:
+    keep_alive = KEEP_ALIVE if keep_alive is None else keep_alive
+    return {"keep_alive": normalize_keep_alive(keep_alive)} if keep_alive is not None else {}
+
+def _complete_json(system: str, prompt: str, model: str = MODEL, keep_alive: Optional[KeepAlive] = None) -> Dict[str, Any]:
     client = Client(host=HOST, timeout=TIMEOUT_S)
     stream = client.chat(
         model=model,
@@ -206,12 +216,15 @@ def _complete_json(system: str, prompt: str, model: str = MODEL) -> Dict[str, An
         ],
         stream=True,
         options={"temperature": 0.2},
+        **_chat_kwargs(keep_alive),
     )
     chunks: List[str] = []
     for chunk in stream:
         content = chunk.get("message", {}).get("content", "")
         if content:
             chunks.append(content)
+        if chunk.get("done"):
+            log_cold_load(model, chunk.get("load_duration"))
     raw = "".join(chunks)
 
     try:
@@ -229,12 +242,15 @@ def _complete_json(system: str, prompt: str, model: str = MODEL) -> Dict[str, An
             ],
             stream=True,
             options={"temperature": 0.0},
+            **_chat_kwargs(keep_alive),
         )
         chunks2: List[str] = []
         for chunk in stream2:
             content = chunk.get("message", {}).get("content", "")
             if content:
                 chunks2.append(content)
+            if chunk.get("done"):
+                log_cold_load(model, chunk.get("load_duration"))
         raw2 = "".join(chunks2)
         return _loads_or_explain("Model JSON (retry)", raw2)
 
@@ -342,9 +358,14 @@ def _normalize_sections(obj: Dict[str, Any]) -> Tuple[Any, Any, str]:
             output = str(output)
 
     return analysis, plan, output
-def run(goal: str, deliverable: str) -> Tuple[Any, Any, str]:
+def run(goal: str, deliverable: str, warm_first: bool = WARM) -> Tuple[Any, Any, str]:
+    keep_alive = None
+    if warm_first:
+        # every request resets the server's expiry, so the calls below must repeat the warm-up's keep_alive
+        keep_alive = DEFAULT_KEEP_ALIVE
+        warm([MODEL], keep_alive=keep_alive, host=HOST)
     prompt = PROMPT_TMPL.format(goal=goal, deliverable=deliverable)
-    obj = _complete_json(GEN_SYS, prompt, MODEL)
+    obj = _complete_json(GEN_SYS, prompt, MODEL, keep_alive=keep_alive)
     return _normalize_sections(obj)
 
 # ---------- CLI ----------
@@ -1,6 +1,8 @@
 # rag_build_index.py
 import os
 import glob
+import time
+import argparse
 import pickle
 from pathlib import Path
 
@@ -8,7 +10,10 @@ import numpy as np
 
 # If FAISS import fails on Windows, skip RAG (as noted in README)
 import faiss  # pip install faiss-cpu
-from sentence_transformers import SentenceTransformer
+
+from app.embedders import BACKENDS, DEFAULT_BACKEND, get_embedder
+from app.dedup import dedup_docs
+from app.lexical import BM25Index
 
 DATA_DIR = Path("./data")
 OUT_DIR = Path("./rag")
@@ -16,6 +21,7 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 INDEX_PATH = OUT_DIR / "index.faiss"
 META_PATH = OUT_DIR / "meta.pkl"
+BM25_PATH = OUT_DIR / "index.bm25.npz"
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 def l2_normalize(vectors: np.ndarray) -> np.ndarray:
@@ -23,6 +29,15 @@ def l2_normalize(vectors: np.ndarray) -> np.ndarray:
     return vectors / norms
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="torch = SentenceTransformer; onnx / onnx-int8 = onnxruntime (no torch needed)")
+    parser.add_argument("--dedup", type=float, default=None, metavar="THRESHOLD",
+                        help="Drop near-duplicate docs (word-shingle Jaccard >= THRESHOLD, e.g. 0.85) before embedding")
+    args = parser.parse_args()
+    if args.dedup is not None and not 0 < args.dedup <= 1:
+        parser.error(f"--dedup must be in (0, 1], e.g. 0.85; got {args.dedup}")
+
     files = sorted(glob.glob(str(DATA_DIR / "*.txt")))
     if not files:
         raise SystemExit("No .txt files found in ./data. Add a few docs first.")
@@ -41,8 +56,21 @@ def main():
 
     print(f"Loaded {len(texts)} docs from ./data")
 
-    model = SentenceTransformer(MODEL_NAME)
-    emb = model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+    aliases, dedup = {}, None
+    if args.dedup is not None:
+        result = dedup_docs(list(zip(ids, texts)), threshold=args.dedup)
+        ids = [doc_id for doc_id, _ in result.docs]
+        texts = [txt for _, txt in result.docs]
+        aliases = result.aliases
+
+    embedder = get_embedder(args.embedder, MODEL_NAME)
+    t0 = time.perf_counter()
+    emb = embedder.encode(texts, show_progress_bar=True)
+    embed_s = time.perf_counter() - t0
+    if args.dedup is not None:
+        dedup = dict(result.report(embed_s), threshold=args.dedup)
+        print(f"Dedup: kept {dedup['docs_kept']} of {dedup['docs_in']} docs, dropped {dedup['docs_dropped']} near-duplicates; "
+              f"embedding took {embed_s:.1f}s, ~{dedup['embed_s_saved_est']:.1f}s saved")
     emb = emb.astype("float32")
     emb = l2_normalize(emb)  # use cosine via inner product + normalized vectors
 
@@ -51,17 +79,22 @@ def main():
     index.add(emb)
 
     faiss.write_index(index, str(INDEX_PATH))
+    # keyword index over the same docs (same order) for rag_query.py --mode hybrid / lexical
+    BM25Index.build(texts, doc_ids=ids).save(str(BM25_PATH))
     with open(META_PATH, "wb") as f:
         pickle.dump(
             {
                 "ids": ids,
                 "model_name": MODEL_NAME,
+                "embedder": embedder.backend,
                 "num_docs": len(ids),
+                "aliases": aliases,  # canonical id -> near-duplicate ids dropped at build time
+                "dedup": dedup,
             },
             f,
         )
 
-    print(f"Wrote index to {INDEX_PATH} and metadata to {META_PATH}")
+    print(f"Wrote index to {INDEX_PATH}, BM25 index to {BM25_PATH} and metadata to {META_PATH}")
 
 if __name__ == "__main__":
     main()
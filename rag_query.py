@@ -1,17 +1,22 @@
 # rag_query.py
 import argparse
 import pickle
+import threading
 from pathlib import Path
 
 import numpy as np
 import faiss  # pip install faiss-cpu
-from sentence_transformers import SentenceTransformer
+
+from app.embedders import BACKENDS, get_embedder
+from app.lexical import BM25Index, hybrid_search
 
 from llm import ask  # uses local Ollama
 
 OUT_DIR = Path("./rag")
 INDEX_PATH = OUT_DIR / "index.faiss"
 META_PATH = OUT_DIR / "meta.pkl"
+BM25_PATH = OUT_DIR / "index.bm25.npz"
+MODES = ("dense", "hybrid", "lexical")
 
 def l2_normalize(vectors: np.ndarray) -> np.ndarray:
     norms = np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
@@ -25,10 +30,32 @@ def load_index():
     meta = pickle.loads(META_PATH.read_bytes())
     return index, meta
 
-def retrieve(query: str, k: int, model_name: str, index, ids):
-    embedder = SentenceTransformer(model_name)
+def load_bm25(index, ids):
+    if not BM25_PATH.exists():
+        raise SystemExit("Missing BM25 index (older builds lack one). Re-run: python rag_build_index.py")
+    try:
+        bm25 = BM25Index.load(str(BM25_PATH))
+    except ValueError as e:
+        raise SystemExit(f"{e}. Re-run: python rag_build_index.py")
+    # a stale file would send hybrid rerank to the wrong stored vectors
+    if not bm25.matches(index.ntotal, ids) or index.ntotal != len(ids):
+        raise SystemExit(f"{BM25_PATH} does not match {INDEX_PATH}. Re-run: python rag_build_index.py")
+    return bm25
+
+def retrieve(query: str, k: int, model_name: str, index, ids, embedder=None, backend=None, mode="dense", bm25=None,
+             candidates=100, alpha=0.5):
+    # mode: dense = full index scan; lexical = BM25 only, no embedding;
+    # hybrid = BM25 shortlist of `candidates`, reranked with the vectors stored in the index
+    if mode != "dense" and bm25 is None:
+        bm25 = load_bm25(index, ids)
+    if mode == "lexical":
+        return [(ids[i], s) for i, s in bm25.search(query, k)]
+    if embedder is None:
+        embedder = get_embedder(backend, model_name)
     q = embedder.encode([query], convert_to_numpy=True).astype("float32")
     q = l2_normalize(q)
+    if mode == "hybrid":
+        return [(ids[i], s) for i, s in hybrid_search(query, q, index, bm25, k, candidates, alpha)]
     scores, idxs = index.search(q, k)
     idxs = idxs[0].tolist()
     scores = scores[0].tolist()
@@ -41,20 +68,39 @@ def main():
     parser.add_argument("--k", type=int, default=4, help="Top-K docs")
     parser.add_argument("--model", type=str, default="mistral", help="Ollama model name")
     parser.add_argument("--num_predict", type=int, default=256)
+    parser.add_argument("--warm", action="store_true", help="Preload the Ollama model while retrieval runs")
+    parser.add_argument("--embedder", choices=BACKENDS, default=None, help="Override the embedder recorded in the index")
+    parser.add_argument("--mode", choices=MODES, default="dense",
+                        help="hybrid = keyword shortlist + dense rerank (good for identifiers / error strings); lexical = keywords only")
     args = parser.parse_args()
 
+    chat_kwargs = {}
+    if args.warm:
+        from app.warmup import DEFAULT_KEEP_ALIVE, preload
+        from llm import BASE_URL
+        # fire-and-forget: the load overlaps with embedding + search instead of the answer call
+        threading.Thread(target=preload, args=(args.model,), kwargs={"host": BASE_URL}, daemon=True).start()
+        # the answer call must repeat the pin, or the server resets the model's expiry to its default
+        chat_kwargs["keep_alive"] = DEFAULT_KEEP_ALIVE
+
     index, meta = load_index()
     ids = meta["ids"]
+    aliases = meta.get("aliases", {})
     model_name = meta["model_name"]
+    # indexes built before the embedder option have no "embedder" key and used torch
+    backend = args.embedder or meta.get("embedder", "torch")
 
-    hits = retrieve(args.question, args.k, model_name, index, ids)
+    hits = retrieve(args.question, args.k, model_name, index, ids, backend=backend, mode=args.mode)
 
     if not hits:
         print("No results.")
         return
 
     # Build a simple context string referencing doc IDs only; keep it compact.
-    ctx_lines = [f"[{rank+1}] {doc_id}" for rank, (doc_id, _score) in enumerate(hits)]
+    ctx_lines = [
+        f"[{rank+1}] {doc_id}" + (f" (duplicates: {', '.join(aliases[doc_id])})" if doc_id in aliases else "")
+        for rank, (doc_id, _score) in enumerate(hits)
+    ]
     context_header = "CANDIDATE SOURCES:\n" + "\n".join(ctx_lines)
 
     system = (
@@ -75,6 +121,7 @@ def main():
         num_predict=args.num_predict,
         temperature=0.2,
         messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+        **chat_kwargs,
     )
 
     print(out)
@@ -1,6 +1,8 @@
 
 import argparse, json
-from app.rag import RAGIndex
+from app.rag import RAGIndex, QUERY_MODES
+from app.shards import ShardedRAGIndex
+from app.embedders import BACKENDS
 from app.ollama_client import chat
 
 MODEL = "mistral:7b"
@@ -9,11 +11,22 @@ if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--question", required=True)
     p.add_argument("--k", type=int, default=3)
+    p.add_argument("--embedder", choices=BACKENDS, default=None, help="Default: the backend recorded in the index")
+    p.add_argument("--mode", choices=QUERY_MODES, default="dense",
+                   help="hybrid = keyword shortlist + dense rerank; lexical = keywords only (single index only)")
+    p.add_argument("--shard-dir", default=None, help="Query a sharded index (see build_index.py --shards)")
+    p.add_argument("--workers", type=int, default=None, help="Shard worker processes (default: one per core)")
     args = p.parse_args()
 
-    idx = RAGIndex()
-    idx.load()
-    top = idx.query(args.question, k=args.k)
+    if args.shard_dir and args.mode != "dense":
+        p.error("--mode hybrid/lexical is not supported with --shard-dir")
+    if args.shard_dir:
+        with ShardedRAGIndex(args.shard_dir, workers=args.workers, backend=args.embedder) as idx:
+            top = idx.query(args.question, k=args.k)
+    else:
+        idx = RAGIndex(backend=args.embedder)
+        idx.load()
+        top = idx.query(args.question, k=args.k, mode=args.mode)
 
     context = "\n\n".join([f"[{i+1}] {d['id']}: {d['text']}" for i, d in enumerate(top)])
     prompt = f"""Answer the user's question using ONLY the context below. Cite sources like [1], [2].
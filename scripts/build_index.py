@@ -1,19 +1,48 @@
 
 import argparse, os, glob
 from app.rag import RAGIndex
+from app.shards import build_shard, build_sharded
+from app.dedup import dedup_docs
+from app.embedders import BACKENDS, DEFAULT_BACKEND
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--docs", default="data/sample_docs")
     p.add_argument("--index", default="data/index.faiss")
     p.add_argument("--meta", default="data/meta.json")
+    p.add_argument("--embedder", choices=BACKENDS, default=DEFAULT_BACKEND)
+    p.add_argument("--shards", type=int, default=0, help="Build a sharded index with N shards into --shard-dir")
+    p.add_argument("--shard-id", type=int, default=None, help="With --shards: build only this shard (0-based)")
+    p.add_argument("--shard-dir", default="data/shards")
+    p.add_argument("--dedup", type=float, default=None, metavar="THRESHOLD",
+                   help="Drop near-duplicate docs (word-shingle Jaccard >= THRESHOLD, e.g. 0.85) before embedding")
     args = p.parse_args()
+    if args.dedup is not None and not 0 < args.dedup <= 1:
+        p.error(f"--dedup must be in (0, 1], e.g. 0.85; got {args.dedup}")
 
     docs = []
-    for path in glob.glob(os.path.join(args.docs, "*.txt")):
+    for path in sorted(glob.glob(os.path.join(args.docs, "*.txt"))):
         with open(path, "r", encoding="utf-8") as f:
             docs.append((os.path.basename(path), f.read()))
 
-    idx = RAGIndex(index_path=args.index, meta_path=args.meta)
-    idx.build(docs)
-    print(f"Indexed {len(docs)} docs -> {args.index}")
+    if args.shards:
+        aliases = {}
+        if args.dedup is not None:
+            # deterministic for a given corpus, so shards built separately agree on what was dropped
+            result = dedup_docs(docs, threshold=args.dedup)
+            docs, aliases = result.docs, result.aliases
+            print(f"Dedup: kept {len(docs)} of {result.n_in} docs, dropped {result.dropped} near-duplicates")
+        if args.shard_id is not None:
+            n = build_shard(docs, args.shard_dir, args.shard_id, args.shards, backend=args.embedder, aliases=aliases)
+            print(f"Indexed {n} of {len(docs)} docs into shard {args.shard_id}/{args.shards} -> {args.shard_dir}")
+        else:
+            sizes = build_sharded(docs, args.shard_dir, args.shards, backend=args.embedder, aliases=aliases)
+            print(f"Indexed {len(docs)} docs into {args.shards} shards {sizes} -> {args.shard_dir}")
+    else:
+        idx = RAGIndex(index_path=args.index, meta_path=args.meta, backend=args.embedder)
+        idx.build(docs, dedup=args.dedup)
+        if idx.dedup_report:
+            r = idx.dedup_report
+            print(f"Dedup: kept {r['docs_kept']} of {r['docs_in']} docs, dropped {r['docs_dropped']} near-duplicates; "
+                  f"embedding took {r['embed_s']:.1f}s, ~{r['embed_s_saved_est']:.1f}s saved")
+        print(f"Indexed {len(idx.meta)} docs with the {args.embedder} embedder -> {args.index}")
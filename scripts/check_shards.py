@@ -0,0 +1,42 @@
+import argparse, os, sys, tempfile
+from app.bench import HashEmbedder, synthetic_corpus
+from app.rag import RAGIndex
+from app.shards import ShardedRAGIndex, build_shard
+
+def check(n_docs: int, n_shards: int, n_queries: int, k: int, workers: int) -> list:
+    """Build a flat index and n_shards shards (each built on its own); return mismatching queries."""
+    docs = synthetic_corpus(n_docs)
+    queries = [txt[:60] for _, txt in docs[:n_queries]]
+    embedder = HashEmbedder()
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = RAGIndex(index_path=os.path.join(tmp, "flat.faiss"), meta_path=os.path.join(tmp, "flat.json"), model=embedder)
+        flat.build(docs)
+        shard_dir = os.path.join(tmp, "shards")
+        sizes = [build_shard(docs, shard_dir, s, n_shards, model=embedder) for s in range(n_shards)]
+        mismatches = []
+        with ShardedRAGIndex(shard_dir, workers=workers, model=embedder) as sharded:
+            got = sharded.search_vectors(flat._encode(queries), k)
+        scores, idxs = flat.index.search(flat._encode(queries), k)
+        for qi, q in enumerate(queries):
+            want = sorted((round(float(s), 4), flat.meta[i]["id"]) for s, i in zip(scores[qi], idxs[qi]) if i >= 0)
+            have = sorted((round(s, 4), d["id"]) for s, d in got[qi])
+            if want != have:
+                mismatches.append((q, want, have))
+    print(f"{n_docs} docs, {n_shards} shards {sizes}: {n_queries - len(mismatches)}/{n_queries} queries match the flat index")
+    return mismatches
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Check that sharded scatter-gather search returns the same top-k as one flat index.")
+    p.add_argument("--docs", type=int, default=2000)
+    p.add_argument("--shards", type=int, default=4)
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--workers", type=int, default=2)
+    args = p.parse_args()
+
+    failed = check(args.docs, args.shards, args.queries, args.k, args.workers)
+    # 3 docs over 4 shards leaves at least one shard empty
+    failed += check(3, 4, 3, 2, args.workers)
+    for q, want, have in failed[:5]:
+        print(f"  MISMATCH {q[:40]!r}: flat={want} sharded={have}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,45 @@
+import argparse, json, os, sys
+from app.bench import BENCHMARKS, DEFAULT_BENCHMARKS, run_all, compare
+
+BASELINE = "data/bench/baseline.json"
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Offline benchmarks against a mock Ollama server and synthetic data.")
+    p.add_argument("--only", default="", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)} "
+                                              f"(default: {', '.join(DEFAULT_BENCHMARKS)})")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save", action="store_true", help="Overwrite the baseline with this run")
+    p.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown vs baseline (fraction); baselines are machine-specific")
+    args = p.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or None
+    unknown = sorted(set(names or []) - set(BENCHMARKS))
+    if unknown:
+        p.error(f"unknown benchmark(s) {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    results = run_all(names)
+
+    print(f"\n{'benchmark':<52} {'value':>12}  unit")
+    for r in results:
+        print(f"{r['name']:<52} {r['value']:>12.3f}  {r['unit']}")
+
+    if args.save:
+        # merge by name so saving a subset (--only) keeps the other baselines
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                merged = {b["name"]: b for b in json.load(f)}
+        merged.update({r["name"]: r for r in results})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(list(merged.values()), f, indent=2)
+            f.write("\n")
+        print(f"\nSaved baseline -> {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), tolerance=args.tolerance)
+        if regressions:
+            print(f"\nRegressions (> {args.tolerance:.0%} worse than {args.baseline}):")
+            for msg in regressions:
+                print("  " + msg)
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline}")
@@ -1,4 +1,56 @@
+import argparse, json, time
+from app.evals import run_basic_evals, load_cases, run_dataset, summarize
 
-from app.evals import run_basic_evals
-res = run_basic_evals()
-print(res)
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Run the basic chain evals, or a JSONL eval dataset with --dataset.")
+    p.add_argument("--dataset", help="JSONL eval cases, e.g. data/evals/basic.jsonl")
+    p.add_argument("--models", default="mistral:7b", help="Comma-separated model tags")
+    p.add_argument("--trials", type=int, default=1)
+    p.add_argument("--workers", type=int, default=4, help="Max concurrent requests")
+    p.add_argument("--host", default=None, help="Ollama base URL (default: $OLLAMA_HOST or localhost:11434)")
+    p.add_argument("--keep-alive", default=None, help="keep_alive sent with each request, e.g. 30m or -1")
+    p.add_argument("--warm", action="store_true", help="Preload the models before timing starts")
+    p.add_argument("--mock", action="store_true", help="Run against a local stand-in Ollama server")
+    p.add_argument("--mock-latency-ms", type=float, default=20.0)
+    p.add_argument("--mock-tokens-per-s", type=float, default=200.0)
+    p.add_argument("--mock-load-ms", type=float, default=0.0, help="Simulated cold-load time on the mock server")
+    p.add_argument("--out", help="Write per-run results + summary as JSON")
+    args = p.parse_args()
+
+    if not args.dataset:
+        res = run_basic_evals()
+        print(res)
+        raise SystemExit(0)
+
+    host = args.host
+    if args.mock:
+        from app.mock_ollama import start_mock_server
+        srv = start_mock_server(latency_ms=args.mock_latency_ms, tokens_per_s=args.mock_tokens_per_s, load_ms=args.mock_load_ms)
+        host = srv.url
+
+    cases = load_cases(args.dataset)
+    if args.mock:
+        skipped = [c["id"] for c in cases if c.get("live_only")]
+        cases = [c for c in cases if not c.get("live_only")]
+        if skipped:
+            print(f"Skipping {len(skipped)} live-only case(s) on the mock server: {', '.join(skipped)}")
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    t0 = time.perf_counter()
+    results = run_dataset(cases, models, trials=args.trials, workers=args.workers, host=host,
+                          keep_alive=args.keep_alive, warm_first=args.warm)
+    wall = time.perf_counter() - t0
+    report = summarize(results)
+
+    print(f"{len(results)} runs ({len(cases)} cases x {len(models)} models x {args.trials} trials) "
+          f"in {wall:.2f}s -> {len(results) / wall:.1f} runs/s with {args.workers} workers")
+    print(f"{'model':<24} {'pass':>6} {'p50_s':>8} {'p95_s':>8} {'tok/s':>8} {'retry':>6} {'err':>4} {'cold':>5}")
+    for model, s in report.items():
+        print(f"{model:<24} {s['pass_rate']:>6.0%} {s['p50_latency_s']:>8.3f} {s['p95_latency_s']:>8.3f} "
+              f"{s['tokens_per_s']:>8.1f} {s['retry_rate']:>6.0%} {s['errors']:>4} {s['cold_loads']:>5}")
+    for r in results:
+        if not r["passed"]:
+            print(f"  FAIL {r['model']} {r['id']} trial={r['trial']}: {r['error'] or r['checks']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": report, "wall_s": wall, "results": results}, f, indent=2)
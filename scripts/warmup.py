@@ -0,0 +1,26 @@
+import argparse
+from app.warmup import DEFAULT_KEEP_ALIVE, COLD_LOAD_S, warm, unload, running
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Preload Ollama models, pin them with keep_alive, and show what is resident.")
+    p.add_argument("--models", default="mistral:7b", help="Comma-separated model tags")
+    p.add_argument("--keep-alive", default=DEFAULT_KEEP_ALIVE, help="e.g. 30m, 2h, 3600 (seconds), -1 (until restart)")
+    p.add_argument("--host", default=None, help="Ollama base URL (default: $OLLAMA_HOST or localhost:11434)")
+    p.add_argument("--ps", action="store_true", help="Only list resident models")
+    p.add_argument("--unload", action="store_true", help="Unload the models instead of warming them")
+    args = p.parse_args()
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    if args.unload:
+        for m in models:
+            unload(m, host=args.host)
+            print(f"Unloaded {m}")
+    elif not args.ps:
+        for m, secs in warm(models, keep_alive=args.keep_alive, host=args.host).items():
+            state = f"loaded in {secs:.1f}s" if secs >= COLD_LOAD_S else "already warm"
+            print(f"{m}: {state} (keep_alive={args.keep_alive})")
+
+    resident = running(host=args.host)
+    print(f"\nResident models ({len(resident)}):")
+    for m in resident:
+        print(f"  {m.get('name'):<28} expires {m.get('expires_at', '?')}  vram={m.get('size_vram', 0) / 2**30:.1f} GiB")